@@ -0,0 +1,40 @@
+"""users.name trigram index
+
+Revision ID: 3069d678478d
+Revises: aa0930e2f379
+Create Date: 2026-10-18 10:14:37.551820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3069d678478d'
+down_revision: Union[str, Sequence[str], None] = 'aa0930e2f379'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # build without blocking writes to users
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_name_trgm',
+            'users',
+            ['name'],
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_name_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
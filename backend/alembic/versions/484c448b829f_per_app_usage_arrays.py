@@ -0,0 +1,44 @@
+"""per-app usage arrays
+
+Revision ID: 484c448b829f
+Revises: e7b2d263cbff
+Create Date: 2026-10-18 15:41:12.803915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '484c448b829f'
+down_revision: Union[str, Sequence[str], None] = 'e7b2d263cbff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'apps',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    # nullable columns without defaults: no rewrite of the existing partitions
+    op.add_column('usage_daily', sa.Column('app_ids', postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.add_column('usage_daily', sa.Column('app_ms', postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.create_check_constraint(
+        'ck_usage_daily_app_arrays', 'usage_daily', 'cardinality(app_ids) = cardinality(app_ms)',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_usage_daily_app_arrays', 'usage_daily', type_='check')
+    op.drop_column('usage_daily', 'app_ms')
+    op.drop_column('usage_daily', 'app_ids')
+    op.drop_table('apps')
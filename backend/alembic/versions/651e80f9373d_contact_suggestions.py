@@ -0,0 +1,50 @@
+"""contact suggestions
+
+Revision ID: 651e80f9373d
+Revises: 484c448b829f
+Create Date: 2026-10-18 16:27:45.139620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '651e80f9373d'
+down_revision: Union[str, Sequence[str], None] = '484c448b829f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'contact_suggestions',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('candidate_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('mutual_count', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'candidate_id'),
+    )
+    # build without blocking writes to connections
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_connections_other_user_status',
+            'connections',
+            ['other_user_id', 'user_id', 'status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_connections_other_user_status', table_name='connections',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_table('contact_suggestions')
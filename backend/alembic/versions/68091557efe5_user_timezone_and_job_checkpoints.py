@@ -0,0 +1,43 @@
+"""users.timezone and job_checkpoints
+
+Revision ID: 68091557efe5
+Revises: 3069d678478d
+Create Date: 2026-10-18 11:40:52.918364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68091557efe5'
+down_revision: Union[str, Sequence[str], None] = '3069d678478d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('timezone', sa.String(), server_default=sa.text("'UTC'"), nullable=False))
+    op.create_index('ix_users_timezone_id', 'users', ['timezone', 'id'])
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('job', sa.String(), nullable=False),
+        sa.Column('cohort', sa.String(), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('last_user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('processed', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('done', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('job', 'cohort', 'week_start'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_checkpoints')
+    op.drop_index('ix_users_timezone_id', table_name='users')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,43 @@
+"""usage_weekly rollup
+
+Revision ID: aa0930e2f379
+Revises: 265ddea2b9c7
+Create Date: 2026-10-18 09:02:11.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aa0930e2f379'
+down_revision: Union[str, Sequence[str], None] = '265ddea2b9c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'usage_weekly',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('total_ms', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'week_start'),
+    )
+    # fold in existing history so past weeks don't read as zero; Postgres weeks start on Monday, same as ISO
+    op.execute("""
+        INSERT INTO usage_weekly (user_id, week_start, total_ms)
+        SELECT user_id, date_trunc('week', date)::date, sum(total_ms)
+        FROM usage_daily
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id, date_trunc('week', date)::date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('usage_weekly')
@@ -0,0 +1,83 @@
+"""partition usage_daily by month
+
+Revision ID: e7a067b8dada
+Revises: 13b60c404dc1
+Create Date: 2026-10-18 13:48:20.071553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a067b8dada'
+down_revision: Union[str, Sequence[str], None] = '13b60c404dc1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # move the plain table aside, freeing its constraint and index names
+    op.execute("ALTER TABLE usage_daily RENAME TO usage_daily_unpartitioned")
+    op.execute("ALTER TABLE usage_daily_unpartitioned RENAME CONSTRAINT usage_daily_pkey TO usage_daily_unpartitioned_pkey")
+    op.execute("ALTER TABLE usage_daily_unpartitioned RENAME CONSTRAINT uq_user_day TO uq_user_day_unpartitioned")
+    op.execute("ALTER INDEX ix_usage_daily_user_id RENAME TO ix_usage_daily_unpartitioned_user_id")
+
+    op.execute("""
+        CREATE TABLE usage_daily (
+            id uuid NOT NULL,
+            user_id uuid REFERENCES users (id),
+            date date NOT NULL,
+            total_ms integer NOT NULL,
+            CONSTRAINT usage_daily_pkey PRIMARY KEY (id, date),
+            CONSTRAINT uq_user_day UNIQUE (user_id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("CREATE INDEX ix_usage_daily_user_id ON usage_daily (user_id)")
+
+    # one partition per month from the oldest row through four months from now;
+    # names match app.db.partitions.partition_name
+    op.execute("""
+        DO $$
+        DECLARE
+            m date;
+            stop date := (date_trunc('month', current_date) + interval '4 months')::date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(date), current_date))::date INTO m FROM usage_daily_unpartitioned;
+            WHILE m < stop LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF usage_daily FOR VALUES FROM (%L) TO (%L)',
+                    'usage_daily_' || to_char(m, '"y"YYYY"m"MM'), m, (m + interval '1 month')::date
+                );
+                m := (m + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE usage_daily_default PARTITION OF usage_daily DEFAULT")
+
+    op.execute("INSERT INTO usage_daily (id, user_id, date, total_ms) SELECT id, user_id, date, total_ms FROM usage_daily_unpartitioned")
+    op.execute("DROP TABLE usage_daily_unpartitioned")
+    op.execute("ANALYZE usage_daily")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE usage_daily RENAME TO usage_daily_partitioned")
+    op.execute("ALTER TABLE usage_daily_partitioned RENAME CONSTRAINT usage_daily_pkey TO usage_daily_partitioned_pkey")
+    op.execute("ALTER TABLE usage_daily_partitioned RENAME CONSTRAINT uq_user_day TO uq_user_day_partitioned")
+    op.execute("ALTER INDEX ix_usage_daily_user_id RENAME TO ix_usage_daily_partitioned_user_id")
+    op.create_table(
+        'usage_daily',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('total_ms', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name='usage_daily_pkey'),
+        sa.UniqueConstraint('user_id', 'date', name='uq_user_day'),
+    )
+    op.create_index('ix_usage_daily_user_id', 'usage_daily', ['user_id'])
+    op.execute("INSERT INTO usage_daily (id, user_id, date, total_ms) SELECT id, user_id, date, total_ms FROM usage_daily_partitioned")
+    op.execute("DROP TABLE usage_daily_partitioned CASCADE")
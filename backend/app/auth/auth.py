@@ -1,8 +1,13 @@
-import os, time, jwt
+import asyncio, os, time, uuid, jwt
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import User as UserModel
+from app.auth.cache import Principal, principal_cache
+from app.auth.revocation import revocation_list
 
 from app.db.sessions import SessionLocal
 
@@ -11,7 +16,15 @@ ALGORITHM = "HS256"
 ACCESS_TTL_SECONDS = 15 * 60
 REFRESH_TTL_SECONDS = 7 * 24 * 3600
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Raising BCRYPT_ROUNDS upgrades existing hashes the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# "thread" (bcrypt releases the GIL), "process", or "inline" to run on the event loop
+PASSWORD_EXECUTOR = os.getenv("PASSWORD_EXECUTOR", "thread")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+# hashes running or queued per process before new ones are turned away
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "32"))
+
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def hash_password(plain: str) -> str:
     return pwd_ctx.hash(plain)
@@ -19,9 +32,67 @@ def hash_password(plain: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_ctx.verify(plain, hashed)
 
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new_hash); new_hash is set when `hashed` uses outdated cost parameters."""
+    return pwd_ctx.verify_and_update(plain, hashed)
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+class PasswordPool:
+    """
+    Runs bcrypt off the event loop on a bounded worker pool.
+    Work beyond `max_pending` is rejected immediately instead of queueing
+    behind a login storm.
+    """
+
+    def __init__(self, kind: str = PASSWORD_EXECUTOR, workers: int = PASSWORD_WORKERS, max_pending: int = PASSWORD_MAX_PENDING):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.kind == "inline":
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Server busy, please retry")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool()
+
+async def hash_password_async(plain: str) -> str:
+    return await password_pool.run(hash_password, plain)
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await password_pool.run(verify_and_update_password, plain, hashed)
+
 def _make_token(sub: str, ttl: int, token_type: str) -> str:
     now = int(time.time())
-    payload = {"sub": str(sub), "type": token_type, "iat": now, "exp": now + ttl}
+    payload = {"sub": str(sub), "type": token_type, "iat": now, "exp": now + ttl, "jti": uuid.uuid4().hex}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_access_token(user_id: str) -> str:
@@ -36,10 +107,12 @@ def decode_token(token: str) -> Optional[dict]:
     except jwt.PyJWTError:
         return None
     
-async def verify_token(token: str):
+async def verify_token(token: str, session: Optional[AsyncSession] = None) -> Optional[Principal]:
     """
-    Decode the JWT and load the corresponding User from the database.
-    Returns a UserModel instance or None.
+    Decode the JWT and resolve the corresponding active user.
+    Principals are served from the in-process cache when possible; only a miss
+    touches the database, through `session` when the caller has one.
+    Returns a Principal or None.
     """
     try:
         # 1. Decode the JWT
@@ -47,13 +120,26 @@ async def verify_token(token: str):
         user_id = payload.get("sub")
         if not user_id:
             return None
+        # a Bloom filter miss answers this without touching the database
+        if await revocation_list.is_revoked(payload.get("jti"), session):
+            return None
 
-        # 2. Load user from DB
-        async with SessionLocal() as session:
+        # 2. Cached principal
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        # 3. Load user from DB
+        if session is None:
+            async with SessionLocal() as own:
+                user = await own.get(UserModel, user_id)
+        else:
             user = await session.get(UserModel, user_id)
-            if not user:
-                return None
-            return user
+        if not user or not user.is_active:
+            return None
+        principal = Principal.from_model(user)
+        principal_cache.put(user_id, principal)
+        return principal
 
     except jwt.ExpiredSignatureError:
         return None
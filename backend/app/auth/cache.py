@@ -0,0 +1,112 @@
+# app/auth/cache.py
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.models import User as UserModel
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached snapshot of an authenticated user, safe to share between requests."""
+    id: uuid.UUID
+    name: str
+    phone_number: str
+    usage_goal_minutes: int
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, u: UserModel) -> "Principal":
+        return cls(
+            id=u.id,
+            name=u.name,
+            phone_number=u.phone_number,
+            usage_goal_minutes=u.usage_goal_minutes,
+            is_active=u.is_active,
+        )
+
+
+class PrincipalCache:
+    """
+    TTL-bounded LRU of principals keyed by token `sub`.
+    Only touched from the event loop thread, so no locking.
+    A size or ttl of 0 turns it off.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, sub: str) -> Optional[Principal]:
+        entry = self._entries.get(sub)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[sub]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(sub)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, sub: str, principal: Principal) -> None:
+        if not self.enabled:
+            return
+        self._entries[sub] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(sub)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, sub: str) -> None:
+        self._entries.pop(sub, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache()
+
+# Any flushed change to a User (update_user, is_active flips, deletes) drops its
+# cached principal once the transaction commits. Bulk UPDATE/DELETE statements
+# bypass the unit of work and are only covered by the TTL.
+_PENDING_KEY = "principal_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    changed = session.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, UserModel):
+            changed.add(str(obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for sub in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(sub)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
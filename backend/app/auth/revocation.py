@@ -0,0 +1,186 @@
+# app/auth/revocation.py
+"""
+Revoked JWT ids, checked without a database round trip in the common case.
+
+Every token carries a `jti`. Revoked ids live in `revoked_tokens` until the
+token would have expired anyway. Each worker mirrors the table in a Bloom
+filter: a miss proves the id was never revoked, and only a hit (a real
+revocation or a rare false positive) is confirmed against the table.
+
+The filter pulls rows revoked since its last look every
+REVOCATION_REFRESH_SECONDS, so a token revoked on another worker is
+accepted there for at most that long. Bloom filters cannot forget, so the
+filter is rebuilt from the unexpired rows every REVOCATION_REBUILD_SECONDS,
+or sooner once it is over capacity. Expired rows are only ever deleted by
+`python -m app.jobs.revocations`, so request paths never write here.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import RevokedToken
+from app.db.sessions import SessionLocal
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_FP_RATE = float(os.getenv("REVOCATION_BLOOM_FP_RATE", "0.001"))
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+# re-read this much before the watermark: rows committed late can carry an older revoked_at
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _utcnow() -> datetime:
+    # expires_at is written by us, as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self._array[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class RevocationList:
+    def __init__(
+        self,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        fp_rate: float = REVOCATION_BLOOM_FP_RATE,
+        refresh_every: float = REVOCATION_REFRESH_SECONDS,
+        rebuild_every: float = REVOCATION_REBUILD_SECONDS,
+    ):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.refresh_every = refresh_every
+        self.rebuild_every = rebuild_every
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._watermark: Optional[datetime] = None  # newest revoked_at seen; None until the first build
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    async def _refresh(self) -> None:
+        if time.monotonic() - self._refreshed_at < self.refresh_every:
+            return
+        # once built, requests keep using the current filter while one of them refreshes it
+        if self._lock.locked() and self._watermark is not None:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if now - self._refreshed_at < self.refresh_every:
+                return
+            rebuild = (
+                self._watermark is None
+                or now - self._built_at >= self.rebuild_every
+                or self._filter.count > self.capacity
+            )
+            async with SessionLocal() as session:
+                q = select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.expires_at > _utcnow())
+                if rebuild:
+                    fresh = BloomFilter(max(self.capacity, self._filter.count), self.fp_rate)
+                else:
+                    q = q.where(RevokedToken.revoked_at > self._watermark - _REFRESH_OVERLAP)
+                    fresh = self._filter
+                watermark = self._watermark
+                for jti, revoked_at in (await session.execute(q)).all():
+                    fresh.add(jti)
+                    if watermark is None or revoked_at > watermark:
+                        watermark = revoked_at
+                if watermark is None:
+                    # nothing revoked yet: start from the clock revoked_at is filled from (the
+                    # database's, in its own time zone), never ours
+                    watermark = (await session.execute(select(func.localtimestamp()))).scalar_one()
+            self._filter = fresh
+            self._watermark = watermark
+            self._refreshed_at = time.monotonic()
+            if rebuild:
+                self._built_at = self._refreshed_at
+
+    async def is_revoked(self, jti: Optional[str], session: Optional[AsyncSession] = None) -> bool:
+        """
+        Tokens issued before ids existed have no jti and cannot be revoked.
+        Pass the request's `session` so a confirmation lookup does not need its own connection.
+        """
+        if not jti:
+            return False
+        await self._refresh()
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        q = select(RevokedToken.jti).where(RevokedToken.jti == jti)
+        if session is None:
+            async with SessionLocal() as own:
+                found = (await own.execute(q)).first() is not None
+        else:
+            found = (await session.execute(q)).first() is not None
+        if not found:
+            self.false_positives += 1
+        return found
+
+    async def revoke(self, session: AsyncSession, payload: dict) -> bool:
+        """
+        Record the token's jti as revoked. Returns False if it already was.
+        The caller owns the commit.
+        """
+        jti = payload.get("jti")
+        if not jti:
+            return False
+        stmt = pg_insert(RevokedToken).values(
+            jti=jti,
+            user_id=uuid.UUID(str(payload["sub"])),
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None),
+        ).on_conflict_do_nothing(index_elements=[RevokedToken.jti]).returning(RevokedToken.jti)
+        inserted = (await session.execute(stmt)).first() is not None
+        # this worker knows at once; the others pick it up on their next refresh
+        self._filter.add(jti)
+        return inserted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "filter_entries": self._filter.count,
+            "filter_bits": self._filter.bits,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+
+async def purge_expired(session: AsyncSession) -> int:
+    """Delete rows whose token has expired anyway. Returns how many; the caller owns the commit."""
+    result = await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= _utcnow()))
+    return result.rowcount
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,108 @@
+# app/db/app_usage.py
+"""
+Per-app daily usage, stored compactly on the usage_daily row itself.
+
+Instead of one row per (user, day, app), each daily row carries two parallel
+integer arrays: ids from the `apps` dictionary and the milliseconds spent in
+each. A day with 50 apps costs two ~200-byte arrays instead of 50 rows with
+their own tuple headers and index entries.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import App, UsageDaily
+from app.db.usage import UsageKey, upsert_daily_usage
+
+# the dictionary only grows and ids never change, so name -> id is cached for good
+APP_ID_CACHE_SIZE = int(os.getenv("APP_ID_CACHE_SIZE", "50000"))
+_app_ids: Dict[str, int] = {}
+
+
+async def app_ids_for(session: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Dictionary ids for `names`, registering unknown ones. At most one INSERT and one SELECT."""
+    wanted = set(names)
+    ids = {n: _app_ids[n] for n in wanted if n in _app_ids}
+    missing = sorted(wanted - ids.keys())  # sorted: concurrent registrations lock rows in the same order
+    if missing:
+        created = set((await session.execute(
+            pg_insert(App).values([{"name": n} for n in missing])
+            .on_conflict_do_nothing(index_elements=[App.name])
+            .returning(App.name)
+        )).scalars())
+        for app_id, name in (await session.execute(select(App.id, App.name).where(App.name.in_(missing)))).all():
+            ids[name] = app_id
+            # names inserted by this transaction are only cached once seen committed
+            if name not in created and len(_app_ids) < APP_ID_CACHE_SIZE:
+                _app_ids[name] = app_id
+    return ids
+
+
+def app_totals(apps: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    """{app name: ms} for one day, adding up an app that is listed more than once."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, ms in apps:
+        totals[name] += ms
+    return dict(totals)
+
+
+async def upsert_daily_app_usage(
+    session: AsyncSession,
+    entries: Iterable[Tuple[uuid.UUID, date, Mapping[str, int]]],
+) -> Tuple[Dict[UsageKey, Tuple[int, bool]], Dict[UsageKey, int]]:
+    """
+    Write (user_id, date, {app name: ms}) rows. Each day's total_ms becomes the sum
+    of its apps, so usage_weekly and everything reading totals stay consistent.
+    Same return value as upsert_daily_usage; the caller owns the commit.
+    """
+    latest: Dict[UsageKey, Mapping[str, int]] = {}
+    for user_id, day, apps in entries:
+        latest[(user_id, day)] = apps
+    if not latest:
+        return {}, {}
+
+    ids = await app_ids_for(session, {name for apps in latest.values() for name in apps})
+    arrays: Dict[UsageKey, Tuple[List[int], List[int]]] = {}
+    totals = []
+    for key, apps in latest.items():
+        merged: Dict[int, int] = defaultdict(int)
+        for name, ms in apps.items():
+            merged[ids[name]] += ms
+        app_ids = sorted(merged)
+        arrays[key] = (app_ids, [merged[a] for a in app_ids])
+        totals.append((key[0], key[1], sum(merged.values())))
+    return await upsert_daily_usage(session, totals, apps=arrays)
+
+
+async def weekly_top_apps(session: AsyncSession, user_id: uuid.UUID, week_start: date, limit: int) -> List[Tuple[str, int]]:
+    """
+    The user's `limit` most used apps over the 7 days from `week_start`, as (name, total_ms).
+    The arrays are unnested per row inside the query and summed per app id; only
+    the top ids are joined back to their names.
+    """
+    unnested = func.unnest(UsageDaily.app_ids, UsageDaily.app_ms).table_valued("app_id", "ms").render_derived("per_app")
+    ranked = (
+        select(unnested.c.app_id, func.sum(unnested.c.ms).label("total_ms"))
+        .select_from(UsageDaily)
+        .join(unnested, true())
+        .where(UsageDaily.user_id == user_id)
+        .where(UsageDaily.date >= week_start, UsageDaily.date < week_start + timedelta(days=7))
+        .group_by(unnested.c.app_id)
+        .order_by(func.sum(unnested.c.ms).desc(), unnested.c.app_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = (await session.execute(
+        select(App.name, ranked.c.total_ms)
+        .join(ranked, ranked.c.app_id == App.id)
+        .order_by(ranked.c.total_ms.desc(), App.id)
+    )).all()
+    return [(name, int(total_ms)) for name, total_ms in rows]
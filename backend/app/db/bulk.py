@@ -0,0 +1,285 @@
+# app/db/bulk.py
+"""
+Bulk import/export of users and usage_daily over Postgres COPY.
+
+    python -m app.db.bulk import-users users.csv
+    python -m app.db.bulk import-usage usage.ndjson
+    python -m app.db.bulk export-usage --user <uuid> --format ndjson --out usage.ndjson
+    python -m app.db.bulk export-users --out - > users.csv
+
+CSV files need a header row naming their columns (any order; see USER_COLUMNS
+and USAGE_COLUMNS); NDJSON has one object per line. Imports COPY into a
+temporary staging table and merge from there in one statement, all in one
+transaction:
+  * users are inserted; rows whose id or phone_number already exists are skipped,
+  * usage rows are upserted on uq_user_day (the last duplicate in the file wins)
+    and the weeks they touch are recomputed in usage_weekly, like the API's write paths.
+Missing monthly partitions are created first. Exports stream CSV with
+COPY TO, or NDJSON from a server-side cursor, in constant memory. Progress
+goes to stderr, so exports can be written to stdout.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import time
+import uuid
+from datetime import date
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Optional, Sequence, Tuple
+
+from app.db.partitions import add_months, ensure_partitions
+from app.db.sessions import engine
+
+
+def _strict_bool(value: Any) -> bool:
+    # bool("false") is True; only accept what clearly means one or the other
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError(f"expected true or false, got {value!r}")
+
+
+# column -> parser for NDJSON values; CSV values are parsed by COPY itself
+USER_COLUMNS: Dict[str, Callable[[Any], Any]] = {
+    "id": uuid.UUID,
+    "name": str,
+    "phone_number": str,
+    "password_hash": str,
+    "usage_goal_minutes": int,
+    "timezone": str,
+    "is_active": _strict_bool,
+}
+USER_REQUIRED = ("name", "phone_number", "password_hash")
+# password hashes never leave the database
+USER_EXPORT = ("id", "name", "phone_number", "usage_goal_minutes", "timezone", "is_active", "created_at")
+
+USAGE_COLUMNS: Dict[str, Callable[[Any], Any]] = {
+    "user_id": uuid.UUID,
+    "date": date.fromisoformat,
+    "total_ms": int,
+}
+USAGE_REQUIRED = tuple(USAGE_COLUMNS)
+USAGE_EXPORT = ("user_id", "date", "total_ms")
+
+CURSOR_PREFETCH = 5000
+
+USERS_STAGING = """
+    CREATE TEMP TABLE users_import (
+        id uuid, name text, phone_number text, password_hash text,
+        usage_goal_minutes integer, timezone text, is_active boolean
+    ) ON COMMIT DROP
+"""
+USERS_MERGE = """
+    INSERT INTO users (id, name, phone_number, password_hash, usage_goal_minutes, timezone, is_active)
+    SELECT coalesce(id, gen_random_uuid()), name, phone_number, password_hash,
+           coalesce(usage_goal_minutes, 0), coalesce(timezone, 'UTC'), coalesce(is_active, true)
+    FROM users_import
+    ON CONFLICT DO NOTHING
+"""
+
+# seq numbers rows in file order, so the last duplicate can win regardless of heap placement
+USAGE_STAGING = "CREATE TEMP TABLE usage_import (seq bigserial, user_id uuid, date date, total_ms integer) ON COMMIT DROP"
+# Same protocol as app.db.usage.upsert_daily_usage: lock the affected usage_weekly rows
+# (creating missing ones) in key order, write the days, then recompute those weeks from
+# usage_daily. Separate statements, so each one's snapshot sees the previous one's effects.
+USAGE_WEEKS = """
+    CREATE TEMP TABLE usage_import_weeks ON COMMIT DROP AS
+    SELECT DISTINCT user_id, date_trunc('week', date)::date AS week_start FROM usage_import
+"""
+USAGE_LOCK_WEEKS = (
+    """
+    INSERT INTO usage_weekly (user_id, week_start, total_ms)
+    SELECT user_id, week_start, 0 FROM usage_import_weeks ORDER BY user_id, week_start
+    ON CONFLICT (user_id, week_start) DO NOTHING
+    """,
+    """
+    SELECT count(*) FROM (
+        SELECT 1 FROM usage_weekly w JOIN usage_import_weeks USING (user_id, week_start)
+        ORDER BY w.user_id, w.week_start
+        FOR UPDATE OF w
+    ) locked
+    """,
+)
+USAGE_MERGE = """
+    INSERT INTO usage_daily (id, user_id, date, total_ms)
+    SELECT gen_random_uuid(), user_id, date, total_ms FROM (
+        SELECT DISTINCT ON (user_id, date) user_id, date, total_ms
+        FROM usage_import
+        ORDER BY user_id, date, seq DESC
+    ) src
+    ORDER BY user_id, date
+    ON CONFLICT ON CONSTRAINT uq_user_day DO UPDATE SET total_ms = excluded.total_ms
+"""
+USAGE_REFRESH_WEEKS = """
+    INSERT INTO usage_weekly (user_id, week_start, total_ms)
+    SELECT w.user_id, w.week_start, coalesce(sum(d.total_ms), 0)
+    FROM usage_import_weeks w
+    LEFT JOIN usage_daily d ON d.user_id = w.user_id AND d.date >= w.week_start AND d.date < w.week_start + 7
+    GROUP BY w.user_id, w.week_start
+    ON CONFLICT (user_id, week_start) DO UPDATE SET total_ms = excluded.total_ms
+"""
+
+
+def report(verb: str, rows: int, elapsed: float) -> None:
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"{verb} {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def _status_count(status: str) -> int:
+    # asyncpg returns the command tag, e.g. "COPY 120000" or "INSERT 0 120000"
+    return int(status.split()[-1])
+
+
+def _csv_columns(f: BinaryIO, allowed: Sequence[str], required: Sequence[str]) -> Tuple[str, ...]:
+    header = f.readline().decode("utf-8-sig")
+    columns = tuple(c.strip() for c in next(csv.reader([header]), []))
+    unknown = set(columns) - set(allowed)
+    missing = set(required) - set(columns)
+    if unknown or missing:
+        raise SystemExit(f"bad CSV header {columns}: unknown {sorted(unknown)}, missing {sorted(missing)}")
+    return columns
+
+
+async def _ndjson_records(
+    f: BinaryIO, parsers: Dict[str, Callable[[Any], Any]], required: Sequence[str],
+) -> AsyncIterator[Tuple[Any, ...]]:
+    for lineno, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        missing = [c for c in required if obj.get(c) is None]
+        if missing:
+            raise SystemExit(f"line {lineno}: missing {missing}")
+        try:
+            record = tuple(None if obj.get(c) is None else parse(obj[c]) for c, parse in parsers.items())
+        except (TypeError, ValueError) as e:
+            raise SystemExit(f"line {lineno}: {e}")
+        yield record
+
+
+async def _copy_in(apg, f: BinaryIO, fmt: str, table: str, parsers, required) -> int:
+    if fmt == "csv":
+        columns = _csv_columns(f, list(parsers), required)
+        status = await apg.copy_to_table(table, source=f, columns=list(columns), format="csv")
+    else:
+        status = await apg.copy_records_to_table(table, records=_ndjson_records(f, parsers, required), columns=list(parsers))
+    return _status_count(status)
+
+
+async def import_users(path: str, fmt: str) -> int:
+    async with engine.connect() as conn:
+        apg = (await conn.get_raw_connection()).driver_connection
+        with open(path, "rb") as f:
+            started = time.perf_counter()
+            async with apg.transaction():
+                await apg.execute(USERS_STAGING)
+                staged = await _copy_in(apg, f, fmt, "users_import", USER_COLUMNS, USER_REQUIRED)
+                inserted = _status_count(await apg.execute(USERS_MERGE))
+    report("imported", inserted, time.perf_counter() - started)
+    if inserted < staged:
+        print(f"skipped {staged - inserted} users whose id or phone number already exists", file=sys.stderr)
+    return inserted
+
+
+async def import_usage(path: str, fmt: str) -> int:
+    async with engine.connect() as conn:
+        apg = (await conn.get_raw_connection()).driver_connection
+        with open(path, "rb") as f:
+            started = time.perf_counter()
+            async with apg.transaction():
+                await apg.execute(USAGE_STAGING)
+                staged = await _copy_in(apg, f, fmt, "usage_import", USAGE_COLUMNS, USAGE_REQUIRED)
+                print(f"staged {staged} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+                first, last = await apg.fetchrow("SELECT min(date), max(date) FROM usage_import")
+                if first is not None:
+                    async with engine.begin() as ddl:
+                        await ensure_partitions(ddl, first, add_months(last, 1))
+                await apg.execute(USAGE_WEEKS)
+                for stmt in USAGE_LOCK_WEEKS:
+                    await apg.execute(stmt)
+                merged = _status_count(await apg.execute(USAGE_MERGE))
+                await apg.execute(USAGE_REFRESH_WEEKS)
+    report("imported", merged, time.perf_counter() - started)
+    return merged
+
+
+def _select(table: str, columns: Sequence[str], user_id: Optional[uuid.UUID]) -> Tuple[str, list]:
+    key = "id" if table == "users" else "user_id"
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if user_id is None:
+        return sql, []
+    order = " ORDER BY date" if table == "usage_daily" else ""
+    return f"{sql} WHERE {key} = $1{order}", [user_id]
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def export(table: str, columns: Sequence[str], out: BinaryIO, fmt: str, user_id: Optional[uuid.UUID]) -> int:
+    sql, args = _select(table, columns, user_id)
+    async with engine.connect() as conn:
+        apg = (await conn.get_raw_connection()).driver_connection
+        started = time.perf_counter()
+        if fmt == "csv":
+            rows = _status_count(await apg.copy_from_query(sql, *args, output=out, format="csv", header=True))
+        else:
+            rows = 0
+            buf = io.StringIO()
+            # server-side cursors need a transaction; it is read-only and never committed
+            async with apg.transaction(readonly=True):
+                async for record in apg.cursor(sql, *args, prefetch=CURSOR_PREFETCH):
+                    buf.write(json.dumps(dict(record), default=_json_default))
+                    buf.write("\n")
+                    rows += 1
+                    if rows % CURSOR_PREFETCH == 0:
+                        out.write(buf.getvalue().encode())
+                        buf = io.StringIO()
+            out.write(buf.getvalue().encode())
+        out.flush()
+    report("exported", rows, time.perf_counter() - started)
+    return rows
+
+
+def _format(path: str, given: Optional[str]) -> str:
+    if given:
+        return given
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+async def main(args) -> None:
+    if args.command in ("import-users", "import-usage"):
+        fmt = _format(args.file, args.format)
+        if args.command == "import-users":
+            await import_users(args.file, fmt)
+        else:
+            await import_usage(args.file, fmt)
+        return
+
+    table, columns = ("users", USER_EXPORT) if args.command == "export-users" else ("usage_daily", USAGE_EXPORT)
+    fmt = _format(args.out, args.format)
+    if args.out == "-":
+        await export(table, columns, sys.stdout.buffer, fmt, args.user)
+    else:
+        with open(args.out, "wb") as out:
+            await export(table, columns, out, fmt, args.user)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("import-users", "import-usage"):
+        p = sub.add_parser(name)
+        p.add_argument("file")
+        p.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    for name in ("export-users", "export-usage"):
+        p = sub.add_parser(name)
+        p.add_argument("--out", default="-", help="file path, or - for stdout")
+        p.add_argument("--format", choices=("csv", "ndjson"), help="default: from --out's extension, else csv")
+        p.add_argument("--user", type=uuid.UUID, help="only this user's rows")
+    asyncio.run(main(parser.parse_args()))
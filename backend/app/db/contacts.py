@@ -0,0 +1,55 @@
+# app/db/contacts.py
+from __future__ import annotations
+
+import uuid
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Connection as ConnModel, ConnectionStatus, User as UserModel
+
+
+async def match_phone_numbers(
+    session: AsyncSession,
+    viewer_id: uuid.UUID,
+    numbers: Sequence[str],
+) -> List[Tuple[UserModel, bool]]:
+    """
+    Active users other than the viewer whose phone_number is in `numbers`, each with
+    whether the viewer is already connected to them. One query: the whole list is a
+    single array parameter probed against the unique phone_number index.
+    """
+    if not numbers:
+        return []
+    rows = (await session.execute(
+        select(UserModel, ConnModel.user_id.is_not(None).label("connected"))
+        .outerjoin(ConnModel, (ConnModel.user_id == viewer_id) & (ConnModel.other_user_id == UserModel.id))
+        .where(UserModel.phone_number == any_(bindparam("numbers", list(numbers), type_=ARRAY(String))))
+        .where(UserModel.is_active.is_(True), UserModel.id != viewer_id)
+    )).all()
+    return [(u, connected) for u, connected in rows]
+
+
+async def connect_all(session: AsyncSession, viewer_id: uuid.UUID, other_ids: Sequence[uuid.UUID]) -> List[uuid.UUID]:
+    """
+    Insert both directions of an accepted connection to every user in `other_ids`
+    in one statement; pairs that already exist are left alone.
+    Returns the ids newly connected to the viewer. The caller owns the commit.
+    """
+    other_ids = [o for o in dict.fromkeys(other_ids) if o != viewer_id]
+    if not other_ids:
+        return []
+    rows = [
+        {"user_id": a, "other_user_id": b, "status": ConnectionStatus.accepted}
+        for other in other_ids
+        for a, b in ((viewer_id, other), (other, viewer_id))
+    ]
+    stmt = (
+        pg_insert(ConnModel).values(rows)
+        .on_conflict_do_nothing(index_elements=[ConnModel.user_id, ConnModel.other_user_id])
+        .returning(ConnModel.user_id, ConnModel.other_user_id)
+    )
+    inserted = (await session.execute(stmt)).all()
+    return [r.other_user_id for r in inserted if r.user_id == viewer_id]
@@ -1,10 +1,16 @@
 import asyncio
+from sqlalchemy import text
+from datetime import date
 from app.db.models import Base
+from app.db.partitions import add_months, ensure_partitions, month_start
 from app.db.sessions import engine
 
 async def init_models():
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
+        today = date.today()
+        await ensure_partitions(conn, month_start(today), add_months(today, 4))
         print("✅ Tables created successfully")
 
 if __name__ == "__main__":
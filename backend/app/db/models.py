@@ -1,7 +1,7 @@
 # app/db/models.py
 from datetime import datetime, date
-from sqlalchemy import Boolean, String, Integer, Date, Enum, ForeignKey, UniqueConstraint, CheckConstraint, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Boolean, String, Integer, Date, Enum, ForeignKey, Index, UniqueConstraint, CheckConstraint, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import enum
 import uuid
@@ -24,6 +24,14 @@ class User(Base):
 
     password_hash: Mapped[str] = mapped_column(String, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    timezone: Mapped[str] = mapped_column(String, nullable=False, server_default=text("'UTC'"))  # IANA name
+
+    __table_args__ = (
+        # trigram index for searchUsers; needs the pg_trgm extension
+        Index("ix_users_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # week rollover walks one timezone cohort at a time in id order
+        Index("ix_users_timezone_id", "timezone", "id"),
+    )
 
 class Connection(Base):
     __tablename__ = "connections"
@@ -33,12 +41,93 @@ class Connection(Base):
 
     __table_args__ = (
         CheckConstraint("user_id <> other_user_id", name="ck_no_self_connect"),
+        # edges are reciprocal, so walking them backwards finds friends; suggestions do
+        # both hops of friend-of-friend as index-only scans on this
+        Index("ix_connections_other_user_status", "other_user_id", "user_id", "status"),
     )
 
 class UsageDaily(Base):
+    """Monthly range-partitioned on date; partitions are managed by app.db.partitions."""
     __tablename__ = "usage_daily"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    # part of the primary key because every unique key must contain the partition key
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
     total_ms: Mapped[int] = mapped_column(Integer, nullable=False)
-    __table_args__ = (UniqueConstraint("user_id", "date", name="uq_user_day"),)
+    # optional per-app breakdown as parallel arrays: app_ms[i] milliseconds spent in apps.id app_ids[i]
+    app_ids: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
+    app_ms: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_user_day"),
+        CheckConstraint("cardinality(app_ids) = cardinality(app_ms)", name="ck_usage_daily_app_arrays"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+class App(Base):
+    """Dictionary of app identifiers (package names, bundle ids) referenced by usage_daily.app_ids."""
+    __tablename__ = "apps"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+
+class UsageWeekly(Base):
+    """Per-user ISO week rollup of usage_daily, kept current by the daily write paths."""
+    __tablename__ = "usage_weekly"
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    week_start: Mapped[date] = mapped_column(Date, primary_key=True)  # Monday of the ISO week
+    total_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+
+class JobCheckpoint(Base):
+    """Progress of a batch job over one cohort, so an interrupted run resumes where it stopped."""
+    __tablename__ = "job_checkpoints"
+    job: Mapped[str] = mapped_column(String, primary_key=True)
+    cohort: Mapped[str] = mapped_column(String, primary_key=True)
+    week_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    last_user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    done: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("false"))
+    updated_at: Mapped[datetime] = mapped_column(server_default=text("now()"))
+
+class OutboxMessage(Base):
+    """
+    Side effects (push notifications) written in the same transaction as the change
+    that causes them and delivered later by app.jobs.notify.
+    """
+    __tablename__ = "outbox"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    recipient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    dedupe_key: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    available_at: Mapped[datetime] = mapped_column(server_default=text("now()"))
+    created_at: Mapped[datetime] = mapped_column(server_default=text("now()"))
+    sent_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("recipient_id", "dedupe_key", name="uq_outbox_recipient_dedupe"),
+        Index("ix_outbox_pending", "available_at", postgresql_where=text("sent_at IS NULL AND failed_at IS NULL")),
+    )
+
+class RevokedToken(Base):
+    """JWT ids that must no longer be accepted; rows are useless, and purged, once the token has expired."""
+    __tablename__ = "revoked_tokens"
+    jti: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(server_default=text("now()"))
+
+    __table_args__ = (
+        # workers poll for rows revoked since their last refresh
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+class ContactSuggestion(Base):
+    """Precomputed friend-of-friend suggestions for high-degree users, refreshed by app.jobs.suggestions."""
+    __tablename__ = "contact_suggestions"
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    candidate_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    mutual_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(server_default=text("now()"))
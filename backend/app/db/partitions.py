@@ -0,0 +1,118 @@
+# app/db/partitions.py
+"""
+Monthly range partitions for usage_daily.
+
+    python -m app.db.partitions                      # create the next 3 months
+    python -m app.db.partitions --retain-months 6    # ...and drop everything older
+
+Retention is a metadata-only DETACH + DROP of whole months instead of a
+bulk DELETE. Rows that land outside any monthly partition go to
+usage_daily_default and are moved into their month's partition when it is
+created; anything there past the cutoff is deleted row by row, which stays
+cheap because the pre-created months keep it small.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.sessions import engine
+
+PARTITIONED_TABLE = "usage_daily"
+_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    y, m = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+async def ensure_partitions(conn: AsyncConnection, start: date, end: date, table: str = PARTITIONED_TABLE) -> List[str]:
+    """
+    Make sure monthly partitions cover [start, end), plus the default partition;
+    existing ones are kept. Returns the partitions in the range.
+
+    CREATE TABLE ... PARTITION OF fails while the default partition holds rows
+    of that month, so a missing month is built as a plain table, the month's
+    rows are moved into it from the default partition, and then it is attached.
+    Run it inside a transaction so a failure leaves nothing half done.
+    """
+    partitions = []
+    await conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+    month = month_start(start)
+    while month < end:
+        name = partition_name(table, month)
+        nxt = add_months(month, 1)
+        if (await conn.execute(text("SELECT to_regclass(:name)"), {"name": f'"{name}"'})).scalar() is None:
+            bounds = {"lo": month, "hi": nxt}
+            await conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+            await conn.execute(text(
+                f'WITH moved AS (DELETE FROM "{table}_default" WHERE date >= :lo AND date < :hi RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ), bounds)
+            await conn.execute(text(
+                f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+            ))
+        partitions.append(name)
+        month = nxt
+    return partitions
+
+
+async def list_partitions(conn: AsyncConnection, table: str = PARTITIONED_TABLE) -> List[str]:
+    rows = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table})
+    return list(rows.scalars())
+
+
+async def drop_partitions_before(conn: AsyncConnection, cutoff: date, table: str = PARTITIONED_TABLE) -> List[str]:
+    """Detach and drop every monthly partition that ends on or before `cutoff`."""
+    dropped = []
+    for name in await list_partitions(conn, table):
+        m = _NAME.search(name)
+        if not m:
+            continue
+        if add_months(date(int(m.group(1)), int(m.group(2)), 1), 1) <= cutoff:
+            await conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    await conn.execute(text(f'DELETE FROM "{table}_default" WHERE date < :cutoff'), {"cutoff": cutoff})
+    return dropped
+
+
+async def maintain(months_ahead: int = 3, retain_months: Optional[int] = None, today: Optional[date] = None) -> None:
+    today = today or date.today()
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn, month_start(today), add_months(today, months_ahead + 1))
+        print(f"partitions present through {created[-1]}")
+        if retain_months is not None:
+            cutoff = add_months(today, -retain_months)
+            dropped = await drop_partitions_before(conn, cutoff)
+            # weekly aggregates follow the same retention
+            await conn.execute(text("DELETE FROM usage_weekly WHERE week_start < :cutoff"), {"cutoff": cutoff})
+            print(f"dropped {len(dropped)} partitions older than {cutoff}: {', '.join(dropped) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=3, help="months to pre-create after the current one")
+    parser.add_argument("--retain-months", type=int, default=None, help="drop data older than this many months")
+    args = parser.parse_args()
+    asyncio.run(maintain(args.ahead, args.retain_months))
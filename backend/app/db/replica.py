@@ -0,0 +1,106 @@
+# app/db/replica.py
+"""
+When a read-only operation may use the replica.
+
+A read goes to the replica unless
+  * its user wrote something within DB_REPLICA_RYW_SECONDS (read-your-writes), or
+  * the replica's measured replay lag exceeds DB_REPLICA_MAX_LAG_SECONDS
+    (or it could not be measured, e.g. the replica is down).
+Lag is sampled at most every DB_REPLICA_LAG_CHECK_SECONDS per worker. Recent
+writers are tracked per worker, so the read-your-writes window only holds
+when the follow-up read reaches the same worker; the lag check covers the rest.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+from sqlalchemy import text
+
+from app.db.sessions import read_engine
+
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "1"))
+DB_REPLICA_RYW_SECONDS = float(os.getenv("DB_REPLICA_RYW_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "1"))
+DB_REPLICA_LAG_TIMEOUT_SECONDS = 2.0
+RECENT_WRITERS_SIZE = 100_000
+
+# 0 when everything received has been replayed; an idle primary would otherwise look lagged
+LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    def __init__(self) -> None:
+        self._recent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.lag = float("inf")
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self.replica = 0
+        self.primary_recent_write = 0
+        self.primary_lagging = 0
+
+    @property
+    def enabled(self) -> bool:
+        return read_engine is not None
+
+    def note_write(self, user_id: Hashable) -> None:
+        self._recent[user_id] = time.monotonic() + DB_REPLICA_RYW_SECONDS
+        self._recent.move_to_end(user_id)
+        while len(self._recent) > RECENT_WRITERS_SIZE:
+            self._recent.popitem(last=False)
+
+    def _wrote_recently(self, user_id: Hashable) -> bool:
+        until = self._recent.get(user_id)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del self._recent[user_id]
+            return False
+        return True
+
+    async def _measure_lag(self) -> float:
+        async with read_engine.connect() as conn:
+            return float((await conn.execute(LAG_SQL)).scalar_one())
+
+    async def _refresh_lag(self) -> None:
+        if time.monotonic() - self._checked_at < DB_REPLICA_LAG_CHECK_SECONDS or self._lock.locked():
+            return
+        async with self._lock:
+            try:
+                self.lag = await asyncio.wait_for(self._measure_lag(), timeout=DB_REPLICA_LAG_TIMEOUT_SECONDS)
+            except Exception:
+                # unreachable or too slow to answer: treat as infinitely behind
+                self.lag = float("inf")
+            self._checked_at = time.monotonic()
+
+    async def can_read(self, user_id: Hashable = None) -> bool:
+        if not self.enabled:
+            return False
+        if user_id is not None and self._wrote_recently(user_id):
+            self.primary_recent_write += 1
+            return False
+        await self._refresh_lag()
+        if self.lag > DB_REPLICA_MAX_LAG_SECONDS:
+            self.primary_lagging += 1
+            return False
+        self.replica += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "enabled": self.enabled,
+            "lag_seconds": self.lag if self.enabled else 0.0,
+            "replica": self.replica,
+            "primary_recent_write": self.primary_recent_write,
+            "primary_lagging": self.primary_lagging,
+        }
+
+
+replica_router = ReplicaRouter()
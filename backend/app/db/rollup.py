@@ -0,0 +1,55 @@
+# app/db/rollup.py
+"""
+Rebuild usage_weekly from usage_daily.
+
+    python -m app.db.rollup [--chunk-size 1000]
+
+Walks users in id order and replaces their rollup rows chunk by chunk, one
+transaction per chunk, so it can run against a live database to backfill the
+table or repair drift.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import delete, func, insert, select
+
+from app.db.models import UsageDaily, UsageWeekly, User as UserModel
+from app.db.sessions import SessionLocal
+
+
+async def rebuild_weekly_rollup(chunk_size: int = 1000) -> int:
+    """Recompute usage_weekly for every user. Returns the number of users processed."""
+    done = 0
+    last_id = None
+    while True:
+        async with SessionLocal() as session:
+            q = select(UserModel.id).order_by(UserModel.id).limit(chunk_size)
+            if last_id is not None:
+                q = q.where(UserModel.id > last_id)
+            ids = (await session.execute(q)).scalars().all()
+            if not ids:
+                return done
+
+            # Postgres weeks start on Monday, same as ISO
+            week = func.date_trunc("week", UsageDaily.date).cast(UsageDaily.date.type)
+            await session.execute(delete(UsageWeekly).where(UsageWeekly.user_id.in_(ids)))
+            await session.execute(
+                insert(UsageWeekly).from_select(
+                    ["user_id", "week_start", "total_ms"],
+                    select(UsageDaily.user_id, week, func.sum(UsageDaily.total_ms))
+                    .where(UsageDaily.user_id.in_(ids))
+                    .group_by(UsageDaily.user_id, week),
+                )
+            )
+            await session.commit()
+
+        done += len(ids)
+        last_id = ids[-1]
+        print(f"rebuilt usage_weekly for {done} users")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(rebuild_weekly_rollup(args.chunk_size))
@@ -0,0 +1,107 @@
+# app/db/suggestions.py
+"""
+Friend-of-friend suggestions ranked by mutual-friend count.
+
+Both hops walk connections backwards (other_user_id -> user_id) through
+ix_connections_other_user_status, which is valid because every accepted edge
+is stored in both directions. Anyone the viewer already has an edge with, in
+any status, is excluded. High-degree users fan out to degree^2 rows, so
+app.jobs.suggestions can precompute their top candidates into
+contact_suggestions. Reads prefer those rows and re-check them against live
+connections, so a contact added since the last refresh never reappears.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import ColumnElement, all_, any_, bindparam, delete, exists, func, insert, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.models import Connection as ConnModel, ConnectionStatus, ContactSuggestion, User as UserModel
+
+
+def _not_connected(viewer, candidate) -> ColumnElement[bool]:
+    edge = aliased(ConnModel)
+    return ~exists().where(edge.user_id == viewer, edge.other_user_id == candidate)
+
+
+def candidates(viewer, limit: int):
+    """SELECT (candidate_id, mutual_count) for `viewer`, which may be a value or a column for LATERAL use."""
+    friend = aliased(ConnModel)  # friend.user_id -> viewer
+    second = aliased(ConnModel)  # second.user_id -> friend
+    mutual = func.count().label("mutual_count")
+    return (
+        select(second.user_id.label("candidate_id"), mutual)
+        .select_from(friend)
+        .join(second, second.other_user_id == friend.user_id)
+        .where(friend.other_user_id == viewer, friend.status == ConnectionStatus.accepted)
+        .where(second.status == ConnectionStatus.accepted, second.user_id != viewer)
+        .where(_not_connected(viewer, second.user_id))
+        .group_by(second.user_id)
+        .order_by(mutual.desc(), second.user_id)
+        .limit(limit)
+    )
+
+
+async def suggestions_for(session: AsyncSession, viewer_id: uuid.UUID, limit: int) -> List[Tuple[UserModel, int]]:
+    """Up to `limit` (user, mutual friends) pairs, precomputed ones if the viewer has any."""
+    pre = (await session.execute(
+        select(UserModel, ContactSuggestion.mutual_count)
+        .join(ContactSuggestion, ContactSuggestion.candidate_id == UserModel.id)
+        .where(ContactSuggestion.user_id == viewer_id, UserModel.is_active.is_(True))
+        .where(_not_connected(viewer_id, ContactSuggestion.candidate_id))
+        .order_by(ContactSuggestion.mutual_count.desc(), UserModel.id)
+        .limit(limit)
+    )).all()
+    if pre:
+        return [(u, n) for u, n in pre]
+
+    # over-fetch a little so deactivated candidates do not shorten the page
+    live = candidates(viewer_id, limit * 2).subquery()
+    rows = (await session.execute(
+        select(UserModel, live.c.mutual_count)
+        .join(live, live.c.candidate_id == UserModel.id)
+        .where(UserModel.is_active.is_(True))
+        .order_by(live.c.mutual_count.desc(), UserModel.id)
+        .limit(limit)
+    )).all()
+    return [(u, n) for u, n in rows]
+
+
+async def heavy_users(session: AsyncSession, min_degree: int) -> List[uuid.UUID]:
+    """Users with at least `min_degree` accepted connections, in id order."""
+    q = (
+        select(ConnModel.other_user_id)
+        .where(ConnModel.status == ConnectionStatus.accepted)
+        .group_by(ConnModel.other_user_id)
+        .having(func.count() >= min_degree)
+        .order_by(ConnModel.other_user_id)
+    )
+    return list((await session.execute(q)).scalars())
+
+
+async def refresh_suggestions(session: AsyncSession, user_ids: Sequence[uuid.UUID], per_user: int) -> int:
+    """Replace the precomputed top `per_user` candidates of `user_ids` in one statement. Returns rows written."""
+    if not user_ids:
+        return 0
+    ids = func.unnest(bindparam("ids", list(user_ids), type_=ARRAY(UUID(as_uuid=True)))).table_valued("id").render_derived("viewer")
+    top = candidates(ids.c.id, per_user).lateral("top")
+    await session.execute(delete(ContactSuggestion).where(
+        ContactSuggestion.user_id == any_(bindparam("stale", list(user_ids), type_=ARRAY(UUID(as_uuid=True))))
+    ))
+    result = await session.execute(insert(ContactSuggestion).from_select(
+        ["user_id", "candidate_id", "mutual_count"],
+        select(ids.c.id, top.c.candidate_id, top.c.mutual_count).select_from(ids).join(top, true()),
+    ))
+    return result.rowcount
+
+
+async def drop_suggestions_except(session: AsyncSession, keep: Sequence[uuid.UUID]) -> int:
+    """Delete precomputed rows of every user not in `keep`, e.g. users who fell below the degree threshold."""
+    result = await session.execute(delete(ContactSuggestion).where(
+        ContactSuggestion.user_id != all_(bindparam("keep", list(keep), type_=ARRAY(UUID(as_uuid=True))))
+    ))
+    return result.rowcount
@@ -0,0 +1,165 @@
+# app/db/usage.py
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, bindparam, column, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import UsageDaily, UsageWeekly
+
+UsageKey = Tuple[uuid.UUID, date]
+
+
+def week_start_of(day: date) -> date:
+    """Monday of the ISO week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def _weeks_param(keys: List[UsageKey]):
+    return func.unnest(
+        bindparam("week_users", [user_id for user_id, _ in keys], type_=ARRAY(UUID(as_uuid=True))),
+        bindparam("week_starts", [week for _, week in keys], type_=ARRAY(Date)),
+    ).table_valued(column("user_id", UUID(as_uuid=True)), column("week_start", Date)).render_derived("wk")
+
+
+async def lock_weeks(session: AsyncSession, keys: Iterable[UsageKey]) -> List[UsageKey]:
+    """
+    Lock the usage_weekly rows of (user_id, week_start) keys, creating missing ones,
+    in key order. Every writer of a week's usage_daily rows takes this lock first and
+    holds it to commit, so refresh_weekly_totals afterwards sees all earlier writers'
+    rows. Returns the keys, sorted.
+    """
+    keys = sorted(set(keys))
+    if keys:
+        wk = _weeks_param(keys)
+        await session.execute(
+            pg_insert(UsageWeekly)
+            .from_select(["user_id", "week_start", "total_ms"], select(wk.c.user_id, wk.c.week_start, literal(0)))
+            .on_conflict_do_nothing(index_elements=[UsageWeekly.user_id, UsageWeekly.week_start])
+        )
+        wk = _weeks_param(keys)
+        await session.execute(
+            select(UsageWeekly.user_id)
+            .join(wk, and_(UsageWeekly.user_id == wk.c.user_id, UsageWeekly.week_start == wk.c.week_start))
+            .order_by(UsageWeekly.user_id, UsageWeekly.week_start)
+            .with_for_update(of=UsageWeekly)
+        )
+    return keys
+
+
+async def refresh_weekly_totals(session: AsyncSession, keys: List[UsageKey]) -> Dict[UsageKey, int]:
+    """
+    Set usage_weekly for (user_id, week_start) keys to the sum of their usage_daily
+    rows, in one INSERT ... SELECT upsert. Call it after lock_weeks and the daily
+    writes, in the same transaction. Returns the resulting weekly totals.
+    """
+    if not keys:
+        return {}
+    wk = _weeks_param(keys)
+    sums = (
+        select(wk.c.user_id, wk.c.week_start, func.coalesce(func.sum(UsageDaily.total_ms), 0))
+        .select_from(wk)
+        .outerjoin(UsageDaily, and_(
+            UsageDaily.user_id == wk.c.user_id,
+            UsageDaily.date >= wk.c.week_start,
+            UsageDaily.date < wk.c.week_start + 7,
+        ))
+        .group_by(wk.c.user_id, wk.c.week_start)
+    )
+    stmt = pg_insert(UsageWeekly).from_select(["user_id", "week_start", "total_ms"], sums)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UsageWeekly.user_id, UsageWeekly.week_start],
+        set_={"total_ms": stmt.excluded.total_ms},
+    ).returning(UsageWeekly.user_id, UsageWeekly.week_start, UsageWeekly.total_ms)
+    rows = (await session.execute(stmt)).all()
+    return {(r.user_id, r.week_start): r.total_ms for r in rows}
+
+
+async def upsert_daily_usage(
+    session: AsyncSession,
+    entries: Iterable[Tuple[uuid.UUID, date, int]],
+    apps: Optional[Dict[UsageKey, Tuple[List[int], List[int]]]] = None,
+) -> Tuple[Dict[UsageKey, Tuple[int, bool]], Dict[UsageKey, int]]:
+    """
+    Write (user_id, date, total_ms) rows with a single
+    INSERT ... ON CONFLICT (user_id, date) DO UPDATE on uq_user_day,
+    and recompute usage_weekly for the weeks they fall in.
+
+    Postgres refuses to touch the same row twice in one statement, so repeated
+    keys are collapsed first; the last value wins, as it would with one call per row.
+    With `apps`, every row also gets its (app_ids, app_ms) breakdown replaced;
+    without it, existing breakdowns are left as they are.
+    Returns ({(user_id, date): (total_ms, inserted)}, {(user_id, week_start): weekly total}).
+    The caller owns the commit.
+    """
+    latest: Dict[UsageKey, int] = {}
+    for user_id, day, total_ms in entries:
+        latest[(user_id, day)] = total_ms
+    if not latest:
+        return {}, {}
+
+    weeks = await lock_weeks(session, ((user_id, week_start_of(day)) for user_id, day in latest))
+
+    # sorted, so concurrent batches lock overlapping days in the same order
+    rows = [
+        {"id": uuid.uuid4(), "user_id": user_id, "date": day, "total_ms": total_ms}
+        for (user_id, day), total_ms in sorted(latest.items())
+    ]
+    if apps is not None:
+        for row in rows:
+            row["app_ids"], row["app_ms"] = apps[(row["user_id"], row["date"])]
+    stmt = pg_insert(UsageDaily).values(rows)
+    set_ = {"total_ms": stmt.excluded.total_ms}
+    if apps is not None:
+        set_.update(app_ids=stmt.excluded.app_ids, app_ms=stmt.excluded.app_ms)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_user_day",
+        set_=set_,
+    ).returning(
+        UsageDaily.user_id,
+        UsageDaily.date,
+        UsageDaily.total_ms,
+        # xmax is 0 only for freshly inserted tuples
+        literal_column("(xmax = 0)").label("inserted"),
+    )
+    rows = (await session.execute(stmt)).all()
+    written = {(r.user_id, r.date): (r.total_ms, r.inserted) for r in rows}
+
+    # recomputed rather than moved by a delta: a delta taken against a row that a
+    # concurrent first write had not committed yet would leave the rollup off for good
+    weekly = await refresh_weekly_totals(session, weeks)
+    return written, weekly
+
+
+async def weekly_totals(session: AsyncSession, keys: Iterable[UsageKey]) -> Dict[UsageKey, int]:
+    """
+    total_ms for many (user_id, week_start) keys, one query per distinct week.
+    ISO weeks read usage_weekly rows; any other 7-day window is a grouped SUM
+    over usage_daily. Keys without usage are absent from the result.
+    """
+    by_week: Dict[date, list] = defaultdict(list)
+    for user_id, week in keys:
+        by_week[week].append(user_id)
+
+    totals: Dict[UsageKey, int] = {}
+    for week, user_ids in by_week.items():
+        if week == week_start_of(week):
+            q = select(UsageWeekly.user_id, UsageWeekly.total_ms).where(
+                UsageWeekly.week_start == week, UsageWeekly.user_id.in_(user_ids)
+            )
+        else:
+            q = (
+                select(UsageDaily.user_id, func.sum(UsageDaily.total_ms))
+                .where(UsageDaily.user_id.in_(user_ids))
+                .where(UsageDaily.date >= week)
+                .where(UsageDaily.date < week + timedelta(days=7))
+                .group_by(UsageDaily.user_id)
+            )
+        for user_id, total in (await session.execute(q)).all():
+            totals[(user_id, week)] = int(total)
+    return totals
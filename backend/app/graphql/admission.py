@@ -0,0 +1,86 @@
+# app/graphql/admission.py
+from __future__ import annotations
+
+import os
+from typing import AsyncIterator, Optional
+
+from graphql import ExecutionResult, GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from app.db.sessions import pool_wait_stats
+from app.ratelimit import RateLimitExceeded, buckets
+
+# sustained writes per second and burst size, per authenticated user (0 = no limit)
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "1"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "20"))
+# the same for unauthenticated mutations (login, register, refreshToken) per client IP;
+# strict by default, since these are where credentials get guessed and accounts mass-created
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "0.2"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "10"))
+# Behind proxies, the header they record the client address in (e.g. X-Forwarded-For) and how
+# many of them there are; the client is that many entries from the right. Unset, the peer address is used.
+RATE_LIMIT_FORWARDED_HEADER = os.getenv("RATE_LIMIT_FORWARDED_HEADER", "")
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+# shed new operations while this many callers are already queued for a DB connection (0 = never)
+SHED_POOL_WAITERS = int(os.getenv("SHED_POOL_WAITERS", "20"))
+
+
+class Overloaded(Exception):
+    pass
+
+
+class AdmissionStats:
+    def __init__(self) -> None:
+        self.limited = 0
+        self.shed = 0
+
+
+admission_stats = AdmissionStats()
+
+
+def client_ip(request) -> Optional[str]:
+    """The caller's address, or None when it cannot be told (no HTTP request, e.g. in-process calls)."""
+    if request is None:
+        return None
+    if RATE_LIMIT_FORWARDED_HEADER:
+        # entries left of the trusted ones are whatever the client sent and cannot be believed
+        hops = [h.strip() for v in request.headers.getlist(RATE_LIMIT_FORWARDED_HEADER) for h in v.split(",") if h.strip()]
+        if hops:
+            return hops[-min(RATE_LIMIT_TRUSTED_PROXIES, len(hops))]
+    client = getattr(request, "client", None)
+    return client.host if client else None
+
+
+class AdmissionControl(SchemaExtension):
+    """
+    Operations are refused up front while the DB pool already has a deep wait
+    queue; each mutation additionally takes a token from the caller's user
+    bucket, or from its client IP's bucket when unauthenticated.
+    """
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        ctx = self.execution_context
+        try:
+            if SHED_POOL_WAITERS and pool_wait_stats.waiting >= SHED_POOL_WAITERS:
+                admission_stats.shed += 1
+                raise Overloaded("Server overloaded, please retry")
+            if ctx.operation_type is OperationType.MUTATION:
+                await self._admit(ctx.context)
+        except (Overloaded, RateLimitExceeded) as e:
+            # a preset result skips execution; raising here would leave other extensions' hooks open
+            ctx.result = ExecutionResult(data=None, errors=[GraphQLError(str(e), original_error=e)])
+        yield
+
+    async def _admit(self, context) -> None:
+        cu = context.get("current_user")
+        if cu is not None:
+            key, rate, burst = f"u:{cu.id}", RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST
+        else:
+            ip = client_ip(context.get("request"))
+            if ip is None:
+                return
+            key, rate, burst = f"ip:{ip}", RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST
+        if rate > 0 and not await buckets.take(key, rate, burst):
+            admission_stats.limited += 1
+            raise RateLimitExceeded("Rate limit exceeded, slow down")
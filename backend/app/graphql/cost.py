@@ -0,0 +1,189 @@
+# app/graphql/cost.py
+"""
+Static cost, depth and alias limits for GraphQL documents.
+
+Fields declare what they cost with the @cost schema directive:
+
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", max_size=50)])
+
+A field's cost is `weight` plus the cost of its selections, times the list
+size it returns: the value of its `multiplier` argument (a number, or the
+length of a list), else `assumed_size`. Undeclared root fields weigh 1,
+everything else 0. The total is computed from the document and variables
+before execution, so an over-budget request never touches the database.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import strawberry
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLObjectType,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+    value_from_ast_untyped,
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.schema.schema_converter import GraphQLCoreConverter
+from strawberry.schema_directive import Location
+
+from app.graphql.metrics import operation_label
+from app.metrics import Histogram
+
+GRAPHQL_MAX_COST = int(os.getenv("GRAPHQL_MAX_COST", "1000"))
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "8"))
+GRAPHQL_MAX_ALIASES = int(os.getenv("GRAPHQL_MAX_ALIASES", "20"))
+
+operation_cost = Histogram(
+    "graphql_operation_cost", "Static cost per admitted or rejected GraphQL operation", ("operation",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+
+@strawberry.schema_directive(locations=[Location.FIELD_DEFINITION], name="cost")
+class Cost:
+    weight: int = 1
+    multiplier: Optional[str] = None  # argument that sizes the returned list
+    assumed_size: Optional[int] = None  # list size when there is no such argument
+    max_size: Optional[int] = None  # reject `multiplier` values above this
+
+
+class CostReport:
+    def __init__(self) -> None:
+        self.cost = 0
+        self.depth = 0
+        self.aliases = 0
+        self.errors: List[str] = []
+
+
+_declared: Dict[Tuple[str, str], Optional[Cost]] = {}
+
+
+def _declared_cost(parent: GraphQLObjectType, name: str) -> Optional[Cost]:
+    key = (parent.name, name)
+    if key not in _declared:
+        field = parent.fields[name]
+        definition = field.extensions.get(GraphQLCoreConverter.DEFINITION_BACKREF)
+        directives = getattr(definition, "directives", None) or []
+        _declared[key] = next((d for d in directives if isinstance(d, Cost)), None)
+    return _declared[key]
+
+
+def _size(value: Any) -> int:
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Walker:
+    def __init__(self, fragments, variables: Dict[str, Any], report: CostReport) -> None:
+        self.fragments = fragments
+        self.variables = variables
+        self.report = report
+
+    def selection_set(self, node: SelectionSetNode, parent, depth: int, root: bool, seen: frozenset) -> int:
+        total = 0
+        for sel in node.selections:
+            if isinstance(sel, FieldNode):
+                total += self.field(sel, parent, depth, root, seen)
+            elif isinstance(sel, InlineFragmentNode):
+                total += self.selection_set(sel.selection_set, parent, depth, root, seen)
+            elif isinstance(sel, FragmentSpreadNode):
+                name = sel.name.value
+                fragment = self.fragments.get(name)
+                if fragment is not None and name not in seen:
+                    total += self.selection_set(fragment.selection_set, parent, depth, root, seen | {name})
+        return total
+
+    def field(self, node: FieldNode, parent, depth: int, root: bool, seen: frozenset) -> int:
+        name = node.name.value
+        if node.alias is not None:
+            self.report.aliases += 1
+        # introspection is left to the document cache and is not charged
+        if name.startswith("__") or not isinstance(parent, GraphQLObjectType) or name not in parent.fields:
+            return 0
+        self.report.depth = max(self.report.depth, depth)
+
+        declared = _declared_cost(parent, name)
+        weight = declared.weight if declared else (1 if root else 0)
+        size = 1
+        if declared and declared.multiplier:
+            arg = next((a for a in node.arguments if a.name.value == declared.multiplier), None)
+            if arg is not None:
+                size = _size(value_from_ast_untyped(arg.value, self.variables))
+            elif declared.assumed_size is not None:
+                size = declared.assumed_size
+            if declared.max_size is not None and size > declared.max_size:
+                self.report.errors.append(
+                    f"{parent.name}.{name}: {declared.multiplier} must be at most {declared.max_size}"
+                )
+        elif declared and declared.assumed_size is not None:
+            size = declared.assumed_size
+
+        children = 0
+        if node.selection_set is not None:
+            child_type = get_named_type(parent.fields[name].type)
+            children = self.selection_set(node.selection_set, child_type, depth + 1, False, seen)
+        return size * (weight + children)
+
+
+def analyze(schema, document, operation_name: Optional[str], variables: Optional[Dict[str, Any]]) -> CostReport:
+    """Cost, depth and alias count of the operation that will run, plus any list-size violations."""
+    report = CostReport()
+    operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+    if operation_name:
+        operations = [d for d in operations if d.name and d.name.value == operation_name]
+    if len(operations) != 1:
+        return report  # validation reports ambiguous or missing operations
+
+    op = operations[0]
+    root_type = schema.get_root_type(op.operation)
+    if root_type is None:
+        return report
+    # variables the client omitted fall back to their declared defaults
+    values = {
+        v.variable.name.value: value_from_ast_untyped(v.default_value)
+        for v in op.variable_definitions if v.default_value is not None
+    }
+    values.update(variables or {})
+    fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)}
+    report.cost = _Walker(fragments, values, report).selection_set(op.selection_set, root_type, 1, True, frozenset())
+    return report
+
+
+class CostLimiter(SchemaExtension):
+    """Rejects operations over the cost, depth or alias budget and reports the cost in extensions."""
+
+    _report: Optional[CostReport] = None
+
+    def on_validate(self) -> Iterator[None]:
+        ctx = self.execution_context
+        if ctx.graphql_document is not None:
+            self._report = report = analyze(ctx.schema._schema, ctx.graphql_document, ctx.operation_name, ctx.variables)
+            operation_cost.observe(report.cost, operation_label(ctx))
+            errors = list(report.errors)
+            if report.cost > GRAPHQL_MAX_COST:
+                errors.append(f"Query cost {report.cost} exceeds the maximum of {GRAPHQL_MAX_COST}")
+            if report.depth > GRAPHQL_MAX_DEPTH:
+                errors.append(f"Query depth {report.depth} exceeds the maximum of {GRAPHQL_MAX_DEPTH}")
+            if report.aliases > GRAPHQL_MAX_ALIASES:
+                errors.append(f"Query uses {report.aliases} aliases, the maximum is {GRAPHQL_MAX_ALIASES}")
+            if errors:
+                # setting errors here also skips validation; the document is never executed
+                ctx.pre_execution_errors = [GraphQLError(e) for e in errors]
+        yield
+
+    def get_results(self) -> Dict[str, Any]:
+        if self._report is None:
+            return {}
+        return {"cost": {"requested": self._report.cost, "maximum": GRAPHQL_MAX_COST}}
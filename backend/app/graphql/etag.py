@@ -0,0 +1,170 @@
+# app/graphql/etag.py
+"""
+Conditional GET for self-scoped GraphQL queries.
+
+A GET query whose root fields only read the caller's own data (`me`,
+`topApps`) gets an ETag derived from the caller's data version, the query and
+its variables. A request carrying a matching If-None-Match is answered
+with 304 before any context, resolver or database work. Mutations that
+change a user's data bump that user's version.
+
+Tagged requests are executed on the primary: the version in the tag is
+bumped there, and a lagging replica would pair it with older data that
+clients then keep revalidating as current.
+
+The in-memory version store is only correct with a single worker process;
+with several workers, point ETAG_VERSION_STORE at Redis so every worker
+sees every bump.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, Optional
+
+from graphql import GraphQLError, OperationDefinitionNode, OperationType, parse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.auth.auth import decode_token
+from app.graphql.persisted import LRU, _persisted_hash, persisted_queries, query_hash
+
+ETAG_VERSION_STORE = os.getenv("ETAG_VERSION_STORE", "memory")
+# root fields whose result depends only on the caller's own user row and usage
+SELF_SCOPED_FIELDS = frozenset({"me", "topApps", "__typename"})
+
+
+class MemoryVersionStore:
+    def __init__(self) -> None:
+        # a fresh epoch per process, so ETags never survive a restart
+        self._epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, user_id: str) -> str:
+        return f"{self._epoch}.{self._versions.get(user_id, 0)}"
+
+    async def bump(self, user_id: str) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+class RedisVersionStore:
+    PREFIX = "soberup:version:"
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("ETAG_VERSION_STORE=redis:// requires the `redis` package") from e
+        self._redis = redis.from_url(url)
+
+    async def get(self, user_id: str) -> str:
+        v = await self._redis.get(self.PREFIX + user_id)
+        return v.decode() if v else "0"
+
+    async def bump(self, user_id: str) -> None:
+        await self._redis.incr(self.PREFIX + user_id)
+
+
+def make_version_store(spec: str = ETAG_VERSION_STORE):
+    if spec.startswith(("redis://", "rediss://")):
+        return RedisVersionStore(spec)
+    if spec == "memory":
+        return MemoryVersionStore()
+    raise ValueError(f"ETAG_VERSION_STORE must be 'memory' or a redis:// URL, got {spec!r}")
+
+
+version_store = make_version_store()
+
+
+async def bump_versions(*user_ids) -> None:
+    for user_id in user_ids:
+        await version_store.bump(str(user_id))
+
+
+class ETagStats:
+    def __init__(self) -> None:
+        self.not_modified = 0
+        self.tagged = 0
+
+
+etag_stats = ETagStats()
+
+
+def is_tagged(request) -> bool:
+    """Whether ConditionalGetMiddleware attached an ETag to this request's response."""
+    return request is not None and getattr(request.state, "etag", None) is not None
+_self_scoped: LRU[bool] = LRU(1000)
+
+
+def _is_self_scoped(query: str, key: str) -> bool:
+    cached = _self_scoped.get(key)
+    if cached is not None:
+        return cached
+    try:
+        doc = parse(query)
+    except GraphQLError:
+        return False
+    ops = [d for d in doc.definitions if isinstance(d, OperationDefinitionNode)]
+    ok = bool(ops) and all(
+        op.operation == OperationType.QUERY
+        and all(getattr(sel, "name", None) is not None and sel.name.value in SELF_SCOPED_FIELDS for sel in op.selection_set.selections)
+        for op in ops
+    )
+    _self_scoped.put(key, ok)
+    return ok
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, path: str) -> None:
+        super().__init__(app)
+        self.path = path.rstrip("/")
+
+    async def _etag(self, request: Request) -> Optional[str]:
+        params = request.query_params
+        query = params.get("query")
+        sha = _persisted_hash(params.get("extensions"))
+        if not query and sha:
+            query = persisted_queries.get(sha)
+        if not query:
+            return None
+        key = query_hash(query)
+        if not _is_self_scoped(query, key):
+            return None
+
+        auth = request.headers.get("Authorization", "")
+        payload = decode_token(auth[7:]) if auth.startswith("Bearer ") else None
+        if not payload or payload.get("type") != "access" or not payload.get("sub"):
+            return None
+        sub = str(payload["sub"])
+
+        version = await version_store.get(sub)
+        variables = params.get("variables") or ""
+        try:
+            # normalise so key order in the client's JSON does not matter
+            variables = json.dumps(json.loads(variables), sort_keys=True) if variables else ""
+        except ValueError:
+            return None
+        digest = hashlib.sha256(f"{sub}|{version}|{key}|{params.get('operationName') or ''}|{variables}".encode()).hexdigest()
+        return f'W/"{digest[:32]}"'
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != "GET" or request.url.path.rstrip("/") != self.path:
+            return await call_next(request)
+        etag = await self._etag(request)
+        if etag is None:
+            return await call_next(request)
+        request.state.etag = etag
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+        if etag in (t.strip() for t in request.headers.get("If-None-Match", "").split(",")):
+            etag_stats.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            etag_stats.tagged += 1
+            response.headers.update(headers)
+        return response
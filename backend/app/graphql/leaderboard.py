@@ -0,0 +1,139 @@
+# app/graphql/leaderboard.py
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, literal, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Connection as ConnModel, ConnectionStatus, UsageWeekly, User as UserModel
+from app.db.sessions import on_primary
+
+LEADERBOARD_CACHE_SIZE = int(os.getenv("LEADERBOARD_CACHE_SIZE", "10000"))
+# Invalidation is per process; the TTL bounds staleness from writes handled by other workers.
+LEADERBOARD_CACHE_TTL_SECONDS = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "60"))
+
+CacheKey = Tuple[uuid.UUID, date]  # (viewer, week_start)
+
+
+@dataclass(frozen=True)
+class Standing:
+    rank: int
+    user_id: uuid.UUID
+    name: str
+    phone_number: str
+    usage_goal_minutes: int
+    total_ms: int
+
+
+async def compute_leaderboard(session: AsyncSession, viewer_id: uuid.UUID, week_start: date) -> List[Standing]:
+    """
+    The viewer and their accepted connections ranked by usage for one ISO week,
+    least usage first, in a single windowed query over usage_weekly.
+    """
+    circle = union(
+        select(literal(viewer_id, UserModel.id.type).label("user_id")),
+        select(ConnModel.other_user_id).where(
+            ConnModel.user_id == viewer_id, ConnModel.status == ConnectionStatus.accepted
+        ),
+    ).subquery()
+    total = func.coalesce(UsageWeekly.total_ms, 0)
+    rows = (await session.execute(
+        select(
+            func.rank().over(order_by=total.asc()).label("rank"),
+            UserModel.id,
+            UserModel.name,
+            UserModel.phone_number,
+            UserModel.usage_goal_minutes,
+            total.label("total_ms"),
+        )
+        .select_from(circle)
+        .join(UserModel, UserModel.id == circle.c.user_id)
+        .outerjoin(UsageWeekly, (UsageWeekly.user_id == circle.c.user_id) & (UsageWeekly.week_start == week_start))
+        .order_by("rank", UserModel.name)
+    )).all()
+    return [Standing(r.rank, r.id, r.name, r.phone_number, r.usage_goal_minutes, int(r.total_ms)) for r in rows]
+
+
+class LeaderboardCache:
+    """
+    LRU of computed leaderboards keyed by (viewer, week). A reverse index from
+    each member to the cached boards they appear on lets a write invalidate
+    exactly the boards it changes.
+    """
+
+    def __init__(self, maxsize: int = LEADERBOARD_CACHE_SIZE, ttl: float = LEADERBOARD_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Standing]]]" = OrderedDict()
+        self._boards_by_member: Dict[uuid.UUID, Set[CacheKey]] = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, viewer_id: uuid.UUID, week_start: date) -> Optional[List[Standing]]:
+        key = (viewer_id, week_start)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, viewer_id: uuid.UUID, week_start: date, board: List[Standing]) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        key = (viewer_id, week_start)
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, board)
+        for s in board:
+            self._boards_by_member[s.user_id].add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for s in entry[1]:
+            keys = self._boards_by_member.get(s.user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._boards_by_member[s.user_id]
+
+    def invalidate_member(self, user_id: uuid.UUID, week_start: Optional[date] = None) -> None:
+        """Drop every cached board `user_id` appears on, optionally only for one week."""
+        for key in list(self._boards_by_member.get(user_id, ())):
+            if week_start is None or key[1] == week_start:
+                self._drop(key)
+
+    def invalidate_viewer(self, viewer_id: uuid.UUID) -> None:
+        """Drop all of a viewer's boards, e.g. after their circle changed."""
+        for key in [k for k in self._entries if k[0] == viewer_id]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._boards_by_member.clear()
+
+
+leaderboard_cache = LeaderboardCache()
+
+
+async def get_leaderboard(session: AsyncSession, viewer_id: uuid.UUID, week_start: date) -> List[Standing]:
+    board = leaderboard_cache.get(viewer_id, week_start)
+    if board is None:
+        # a lagging replica could cache a board that an already-applied invalidation missed
+        with on_primary(session):
+            board = await compute_leaderboard(session, viewer_id, week_start)
+        leaderboard_cache.put(viewer_id, week_start, board)
+    return board
@@ -0,0 +1,34 @@
+# app/graphql/loaders.py
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from functools import partial
+from typing import List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+from strawberry.types import Info
+
+from app.db.usage import weekly_totals
+
+
+async def _load_weekly_totals(session: AsyncSession, keys: List[Tuple[str, date]]) -> List[int]:
+    parsed = [(uuid.UUID(str(user_id)), week) for user_id, week in keys]
+    totals = await weekly_totals(session, parsed)
+    return [totals.get(k, 0) for k in parsed]
+
+
+class Loaders:
+    """Per-request DataLoaders; everything resolved in the same tick is fetched together."""
+
+    def __init__(self, session: AsyncSession):
+        # keyed by (user id, week_start)
+        self.weekly_total = DataLoader(load_fn=partial(_load_weekly_totals, session))
+
+
+def get_loaders(info: Info) -> Loaders:
+    loaders = info.context.get("loaders")
+    if loaders is None:
+        loaders = info.context["loaders"] = Loaders(info.context["session"])
+    return loaders
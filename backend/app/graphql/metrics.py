@@ -0,0 +1,115 @@
+# app/graphql/metrics.py
+from __future__ import annotations
+
+import os
+import time
+from inspect import isawaitable
+from typing import Any, Dict, Iterator, Set
+
+from graphql import OperationDefinitionNode
+from strawberry.extensions import SchemaExtension
+
+from app.db.sessions import SqlStats, current_sql_stats
+from app.metrics import Histogram
+
+# Adds a `timing` entry to every response's extensions; for debugging only.
+GRAPHQL_DEBUG_TIMING = os.getenv("GRAPHQL_DEBUG_TIMING", "0") == "1"
+# distinct operation names kept as metric labels; any further ones are counted as "other"
+METRICS_MAX_OPERATIONS = int(os.getenv("METRICS_MAX_OPERATIONS", "200"))
+
+operation_duration = Histogram(
+    "graphql_operation_duration_seconds", "Wall time per GraphQL operation", ("operation", "type"),
+)
+resolver_duration = Histogram(
+    "graphql_resolver_duration_seconds", "Wall time per root or async field resolver", ("field",),
+)
+sql_statements = Histogram(
+    "graphql_operation_sql_statements", "SQL statements executed per GraphQL operation", ("operation",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+sql_duration = Histogram(
+    "graphql_operation_sql_duration_seconds", "Time spent in SQL per GraphQL operation", ("operation",),
+)
+
+
+_operation_labels: Set[str] = set()
+
+
+def operation_label(ctx) -> str:
+    """
+    A bounded metric label for the operation. operationName comes from the
+    client, so it is only used when the document defines an operation of
+    that name, and only for the first METRICS_MAX_OPERATIONS such names.
+    """
+    document = ctx.graphql_document
+    if document is None:
+        return "other"
+    name = ctx.operation_name
+    if name is None:
+        return "anonymous"
+    defined = any(isinstance(d, OperationDefinitionNode) and d.name and d.name.value == name for d in document.definitions)
+    if not defined:
+        return "other"
+    if name not in _operation_labels:
+        if len(_operation_labels) >= METRICS_MAX_OPERATIONS:
+            return "other"
+        _operation_labels.add(name)
+    return name
+
+
+class QueryMetrics(SchemaExtension):
+    """Times operations and resolvers and counts the SQL each operation issues."""
+
+    def on_operation(self) -> Iterator[None]:
+        self._sql = SqlStats()
+        self._resolvers: Dict[str, float] = {}
+        self._elapsed = None
+        token = current_sql_stats.set(self._sql)
+        self._started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._elapsed = time.perf_counter() - self._started
+            current_sql_stats.reset(token)
+            ctx = self.execution_context
+            name = operation_label(ctx)
+            try:
+                op_type = ctx.operation_type.value
+            except RuntimeError:  # the document did not parse
+                op_type = "unknown"
+            operation_duration.observe(self._elapsed, name, op_type)
+            sql_statements.observe(self._sql.count, name)
+            sql_duration.observe(self._sql.seconds, name)
+
+    def resolve(self, _next, root, info, *args, **kwargs) -> Any:
+        # sync on purpose: an async hook would turn every scalar field into a coroutine
+        started = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return self._timed(result, info, started)
+        if root is not None:
+            # plain attribute reads are not worth a sample
+            return result
+        self._record(info, time.perf_counter() - started)
+        return result
+
+    async def _timed(self, result, info, started: float) -> Any:
+        result = await result
+        self._record(info, time.perf_counter() - started)
+        return result
+
+    def _record(self, info, elapsed: float) -> None:
+        field = f"{info.parent_type.name}.{info.field_name}"
+        resolver_duration.observe(elapsed, field)
+        self._resolvers[field] = self._resolvers.get(field, 0.0) + elapsed
+
+    def get_results(self) -> Dict[str, Any]:
+        if not GRAPHQL_DEBUG_TIMING:
+            return {}
+        return {
+            "timing": {
+                "duration_ms": round((self._elapsed or time.perf_counter() - self._started) * 1000, 3),
+                "sql": {"count": self._sql.count, "duration_ms": round(self._sql.seconds * 1000, 3)},
+                "resolvers_ms": {k: round(v * 1000, 3) for k, v in self._resolvers.items()},
+            }
+        }
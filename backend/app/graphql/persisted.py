@@ -0,0 +1,182 @@
+# app/graphql/persisted.py
+"""
+Automatic persisted queries (APQ) and a parsed/validated document cache.
+
+Clients may send `extensions.persistedQuery.sha256Hash` instead of the query
+text. An unknown hash is answered with a GraphQL error "PersistedQueryNotFound"
+(extensions.code PERSISTED_QUERY_NOT_FOUND); the client then retries once with
+both the query and the hash, which registers it.
+Independently of APQ, every successfully validated document is kept by hash
+so repeated operations skip parsing and validation.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Generic, Hashable, Iterator, Optional, TypeVar
+
+from graphql import DocumentNode, GraphQLError
+try:
+    from cross_web import HTTPException
+except ImportError:  # strawberry releases from before lia was renamed cross_web
+    from lia import HTTPException
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+from strawberry.types import ExecutionResult
+
+APQ_CACHE_SIZE = int(os.getenv("APQ_CACHE_SIZE", "1000"))
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "1000"))
+
+V = TypeVar("V")
+
+
+class LRU(Generic[V]):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+@dataclass
+class CachedDocument:
+    document: DocumentNode
+    cost: float  # seconds parse + validate took when it was first seen
+
+
+class DocumentCacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.spent_seconds = 0.0
+        self.saved_seconds = 0.0
+        self.apq_hits = 0
+        self.apq_misses = 0
+        self.apq_registered = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "documents_cached": len(documents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "parse_validate_ms_spent": round(self.spent_seconds * 1000, 3),
+            "parse_validate_ms_saved": round(self.saved_seconds * 1000, 3),
+            "persisted_queries": len(persisted_queries),
+            "apq_hits": self.apq_hits,
+            "apq_misses": self.apq_misses,
+            "apq_registered": self.apq_registered,
+        }
+
+
+persisted_queries: LRU[str] = LRU(APQ_CACHE_SIZE)
+documents: LRU[CachedDocument] = LRU(DOCUMENT_CACHE_SIZE)
+document_cache_stats = DocumentCacheStats()
+
+
+class DocumentCache(SchemaExtension):
+    """Serve parse + validate results from `documents` when the query hash is known."""
+
+    def on_parse(self) -> Iterator[None]:
+        ctx = self.execution_context
+        self._key = query_hash(ctx.query) if ctx.query else None
+        self._cached = documents.get(self._key) if self._key else None
+        if self._cached is not None:
+            ctx.graphql_document = self._cached.document
+            yield
+            return
+        started = time.perf_counter()
+        yield
+        self._elapsed = time.perf_counter() - started
+
+    def on_validate(self) -> Iterator[None]:
+        ctx = self.execution_context
+        if self._cached is not None:
+            # only valid documents are cached, so there is nothing to re-check
+            ctx.pre_execution_errors = []
+            document_cache_stats.hits += 1
+            document_cache_stats.saved_seconds += self._cached.cost
+            yield
+            return
+        started = time.perf_counter()
+        yield
+        cost = self._elapsed + time.perf_counter() - started
+        document_cache_stats.misses += 1
+        document_cache_stats.spent_seconds += cost
+        if self._key and not ctx.pre_execution_errors:
+            documents.put(self._key, CachedDocument(ctx.graphql_document, cost))
+
+
+def _persisted_hash(extensions: Any) -> Optional[str]:
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    pq = extensions.get("persistedQuery")
+    if not isinstance(pq, dict) or pq.get("version", 1) != 1:
+        return None
+    return pq.get("sha256Hash")
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    async def execute_operation(self, request, context, root_value, sub_response):
+        try:
+            return await super().execute_operation(request, context, root_value, sub_response)
+        except PersistedQueryNotFound:
+            # the shape APQ clients look for before retrying with the full query
+            return ExecutionResult(data=None, errors=[
+                GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"}),
+            ])
+
+    async def parse_http_body(self, request):
+        data = await super().parse_http_body(request)
+        sha = _persisted_hash(getattr(data, "extensions", None))
+        if not sha:
+            return data
+
+        if data.query:
+            if query_hash(data.query) != sha:
+                raise HTTPException(400, "provided sha does not match query")
+            if persisted_queries.get(sha) is None:
+                persisted_queries.put(sha, data.query)
+                document_cache_stats.apq_registered += 1
+            return data
+
+        query = persisted_queries.get(sha)
+        if query is None:
+            document_cache_stats.apq_misses += 1
+            raise PersistedQueryNotFound()
+        document_cache_stats.apq_hits += 1
+        data.query = query
+        return data
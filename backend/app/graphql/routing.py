@@ -0,0 +1,36 @@
+# app/graphql/routing.py
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from app.db.replica import replica_router
+from app.db.sessions import use_replica
+from app.graphql.etag import is_tagged
+
+
+class ReadRouting(SchemaExtension):
+    """
+    Points query operations' sessions at the read replica when replica_router
+    allows it; mutations stay on the primary and open their user's
+    read-your-writes window. Conditional GETs stay on the primary too, since
+    their ETag carries the primary's data version.
+    """
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        ctx = self.execution_context
+        cu = ctx.context.get("current_user")
+        session = ctx.context.get("session")
+        op_type = ctx.operation_type
+        if (
+            op_type is OperationType.QUERY
+            and session is not None
+            and not is_tagged(ctx.context.get("request"))
+            and await replica_router.can_read(cu.id if cu else None)
+        ):
+            use_replica(session)
+        yield
+        if op_type is OperationType.MUTATION and cu is not None:
+            replica_router.note_write(cu.id)
@@ -1,14 +1,34 @@
 # app/gql/schema.py
 from __future__ import annotations
+import asyncio
+import base64
+import uuid
 import bcrypt
 import strawberry
-from datetime import date, timedelta
-from typing import Optional, List
+from datetime import date
+from typing import AsyncGenerator, Optional, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from strawberry.types import Info
-from sqlalchemy import select, func
-
-from app.db.models import User as UserModel, UsageDaily, Connection as ConnModel, ConnectionStatus
-from app.auth.auth import create_access_token, create_refresh_token, decode_token, hash_password, verify_password
+from sqlalchemy import and_, func, or_, select
+
+from app.db.models import User as UserModel, Connection as ConnModel, ConnectionStatus
+from app.db.app_usage import app_totals, upsert_daily_app_usage, weekly_top_apps
+from app.db.contacts import connect_all, match_phone_numbers
+from app.db.sessions import SessionLocal
+from app.db.suggestions import suggestions_for
+from app.db.usage import upsert_daily_usage, week_start_of
+from app.graphql.admission import AdmissionControl
+from app.graphql.cost import Cost, CostLimiter
+from app.graphql.etag import bump_versions
+from app.graphql.leaderboard import get_leaderboard, leaderboard_cache
+from app.graphql.loaders import get_loaders
+from app.graphql.metrics import QueryMetrics
+from app.graphql.persisted import DocumentCache
+from app.graphql.routing import ReadRouting
+from app.phone import normalize_e164
+from app.pubsub import broker
+from app.auth.revocation import revocation_list
+from app.auth.auth import verify_token, create_access_token, create_refresh_token, decode_token, hash_password_async, verify_and_update_password_async
 
 @strawberry.input
 class RegisterInput:
@@ -40,9 +60,39 @@ class WeeklyProgress:
     total_ms: int
     percent: float
 @strawberry.input
+class DailyUsageInput:
+    user_id: strawberry.ID
+    total_ms: int
+    date_: date = strawberry.field(name="date")
+
+@strawberry.type
+class DailyUsageResult:
+    user_id: strawberry.ID
+    total_ms: int
+    inserted: bool
+    date_: date = strawberry.field(name="date")
+
+@strawberry.input
+class AppUsageInput:
+    app: str  # package name or bundle id
+    ms: int
+
+@strawberry.input
+class DailyAppUsageInput:
+    user_id: strawberry.ID
+    apps: List[AppUsageInput]
+    date_: date = strawberry.field(name="date")
+
+@strawberry.type
+class AppUsage:
+    app: str
+    total_ms: int
+
+@strawberry.input
 class UserUpdateInput:
     name: Optional[str] = None
     usage_goal_minutes: Optional[int] = None
+    timezone: Optional[str] = None  # IANA name, e.g. "Europe/Berlin"
 
 @strawberry.type
 class User:
@@ -52,23 +102,89 @@ class User:
     usage_goal_minutes: int
 
 
-    @strawberry.field
+    @strawberry.field(directives=[Cost(weight=1)])
     async def weekly_progress(self, info: Info, week_start: date) -> WeeklyProgress:
-        session = info.context["session"]
-        week_end = week_start + timedelta(days=7)
-        total_ms = (
-            await session.execute(
-                select(func.coalesce(func.sum(UsageDaily.total_ms), 0))
-                .where(UsageDaily.user_id == self.id)
-                .where(UsageDaily.date >= week_start)
-                .where(UsageDaily.date < week_end)
-            )
-        ).scalar_one()
-        # load goal
-        u = await session.get(UserModel, self.id)
-        goal = u.usage_goal_minutes if u else 0
-        pct = min(100.0, (total_ms / (goal * 60_000)) * 100) if goal > 0 else 0.0
-        return WeeklyProgress(goal_minutes=goal, total_ms=total_ms, percent=pct)
+        return await load_weekly_progress(info, self, week_start)
+
+@strawberry.type
+class FriendProgressEvent:
+    user_id: strawberry.ID
+    week_start: date
+    total_ms: int
+
+async def publish_weekly_totals(weekly) -> None:
+    """Tell subscribers about committed weekly totals; topics are the user ids."""
+    for (user_id, week), total_ms in weekly.items():
+        await broker.publish(str(user_id), {
+            "user_id": str(user_id),
+            "week_start": week.isoformat(),
+            "total_ms": total_ms,
+        })
+
+@strawberry.type
+class LeaderboardEntry:
+    rank: int
+    user: User
+    total_ms: int
+    percent: float
+    is_me: bool
+
+@strawberry.type
+class UserSearchPage:
+    items: List[User]
+    next_cursor: Optional[str]
+
+SEARCH_MAX_LIMIT = 50
+USAGE_BATCH_MAX_SIZE = 1000
+TOP_APPS_MAX_LIMIT = 50
+# list fields without a size argument are charged as if they returned this many items
+FRIENDS_ASSUMED_SIZE = 50
+
+def _encode_search_cursor(score: float, user_id) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{user_id}".encode()).decode()
+
+def _decode_search_cursor(cursor: str):
+    try:
+        score, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)
+        return float(score), uuid.UUID(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+@strawberry.type
+class ContactMatch:
+    phone_number: str  # as sent by the client
+    user: User
+    connected: bool
+
+CONTACTS_MAX_NUMBERS = 5000
+
+def _normalized_contacts(phone_numbers: List[str], default_country_code: Optional[str]):
+    """{e164: first raw spelling} for the entries that normalize."""
+    by_e164 = {}
+    for raw in phone_numbers:
+        e164 = normalize_e164(raw, default_country_code)
+        if e164:
+            by_e164.setdefault(e164, raw)
+    return by_e164
+
+@strawberry.type
+class SuggestedContact:
+    user: User
+    mutual_friends: int
+
+SUGGESTIONS_MAX_LIMIT = 50
+
+@strawberry.type
+class Friend:
+    user: User
+    weekly_progress: WeeklyProgress
+
+async def load_weekly_progress(info: Info, user: User, week_start: date) -> WeeklyProgress:
+    # the goal comes with the already-loaded user; totals are batched across the request
+    total_ms = await get_loaders(info).weekly_total.load((user.id, week_start))
+    goal = user.usage_goal_minutes
+    pct = min(100.0, (total_ms / (goal * 60_000)) * 100) if goal > 0 else 0.0
+    return WeeklyProgress(goal_minutes=goal, total_ms=total_ms, percent=pct)
 
 @strawberry.type
 class Query:
@@ -77,15 +193,12 @@ class Query:
         cu = info.context.get("current_user")
         if not cu:
             return None
-        session = info.context["session"]
-        u = await session.get(UserModel, cu.id)
-        if not u:
-            return None
+        # the principal from get_context is already current; no need to hit the DB again
         return User(
-            id=str(u.id),
-            name=u.name,
-            phone_number=u.phone_number,
-            usage_goal_minutes=u.usage_goal_minutes,
+            id=str(cu.id),
+            name=cu.name,
+            phone_number=cu.phone_number,
+            usage_goal_minutes=cu.usage_goal_minutes,
         )
 
     @strawberry.field
@@ -107,19 +220,20 @@ class Query:
             usage_goal_minutes=u.usage_goal_minutes,
         )
 
-    @strawberry.field
-    async def search_users(self, info: Info, q: str, limit: int = 20) -> List[User]:
-        current_user = info.context.get("current_user")
-        if not current_user:
+    @strawberry.field(directives=[Cost(weight=2, assumed_size=FRIENDS_ASSUMED_SIZE)])
+    async def friends(self, info: Info, week_start: date) -> List[Friend]:
+        cu = info.context.get("current_user")
+        if not cu:
             raise PermissionError("Authentication required")
-        if str(current_user.id) != str(self.id):
-            raise PermissionError("Not allowed to view other users’ data")
-        
+
         session = info.context["session"]
         rows = (await session.execute(
-            select(UserModel).where(UserModel.name.ilike(f"%{q}%")).limit(limit)
+            select(UserModel)
+            .join(ConnModel, ConnModel.other_user_id == UserModel.id)
+            .where(ConnModel.user_id == cu.id, ConnModel.status == ConnectionStatus.accepted)
+            .order_by(UserModel.name)
         )).scalars().all()
-        return [
+        users = [
             User(
                 id=str(u.id),
                 name=u.name,
@@ -128,6 +242,150 @@ class Query:
             )
             for u in rows
         ]
+        progress = await asyncio.gather(*(load_weekly_progress(info, u, week_start) for u in users))
+        return [Friend(user=u, weekly_progress=p) for u, p in zip(users, progress)]
+
+    @strawberry.field(directives=[Cost(weight=2, assumed_size=FRIENDS_ASSUMED_SIZE)])
+    async def leaderboard(self, info: Info, week_start: date) -> List[LeaderboardEntry]:
+        """Where the caller ranks among their connections this ISO week; least usage ranks first."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        board = await get_leaderboard(session, cu.id, week_start_of(week_start))
+        return [
+            LeaderboardEntry(
+                rank=s.rank,
+                user=User(
+                    id=str(s.user_id),
+                    name=s.name,
+                    phone_number=s.phone_number,
+                    usage_goal_minutes=s.usage_goal_minutes,
+                ),
+                total_ms=s.total_ms,
+                percent=min(100.0, (s.total_ms / (s.usage_goal_minutes * 60_000)) * 100) if s.usage_goal_minutes > 0 else 0.0,
+                is_me=s.user_id == cu.id,
+            )
+            for s in board
+        ]
+
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", assumed_size=20, max_size=SEARCH_MAX_LIMIT)])
+    async def search_users(
+        self,
+        info: Info,
+        q: str,
+        limit: int = 20,
+        after: Optional[str] = None,
+    ) -> UserSearchPage:
+        current_user = info.context.get("current_user")
+        if not current_user:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        q = q.strip()
+        if not q:
+            return UserSearchPage(items=[], next_cursor=None)
+
+        # both predicates are served by the ix_users_name_trgm GIN index
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        score = func.similarity(UserModel.name, q).label("score")
+        stmt = (
+            select(UserModel, score)
+            .where(or_(UserModel.name.op("%")(q), UserModel.name.ilike(f"%{escaped}%", escape="\\")))
+            .order_by(score.desc(), UserModel.id)
+            .limit(limit + 1)
+        )
+        if after:
+            # keyset: continue strictly after the last (score, id) of the previous page
+            last_score, last_id = _decode_search_cursor(after)
+            stmt = stmt.where(or_(
+                func.similarity(UserModel.name, q) < last_score,
+                and_(func.similarity(UserModel.name, q) == last_score, UserModel.id > last_id),
+            ))
+
+        rows = (await session.execute(stmt)).all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last_user, last_score = page[-1]
+            next_cursor = _encode_search_cursor(last_score, last_user.id)
+        return UserSearchPage(
+            items=[
+                User(
+                    id=str(u.id),
+                    name=u.name,
+                    phone_number=u.phone_number,
+                    usage_goal_minutes=u.usage_goal_minutes,
+                )
+                for u, _ in page
+            ],
+            next_cursor=next_cursor,
+        )
+
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", assumed_size=5, max_size=TOP_APPS_MAX_LIMIT)])
+    async def top_apps(self, info: Info, week_start: date, limit: int = 5) -> List[AppUsage]:
+        """The caller's most used apps over the 7 days from `week_start`, most time first."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        rows = await weekly_top_apps(session, cu.id, week_start, max(1, min(limit, TOP_APPS_MAX_LIMIT)))
+        return [AppUsage(app=name, total_ms=total_ms) for name, total_ms in rows]
+
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", assumed_size=10, max_size=SUGGESTIONS_MAX_LIMIT)])
+    async def suggested_contacts(self, info: Info, limit: int = 10) -> List[SuggestedContact]:
+        """Friends of the caller's friends they are not connected to, most mutual friends first."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        rows = await suggestions_for(session, cu.id, max(1, min(limit, SUGGESTIONS_MAX_LIMIT)))
+        return [
+            SuggestedContact(
+                user=User(
+                    id=str(u.id),
+                    name=u.name,
+                    phone_number=u.phone_number,
+                    usage_goal_minutes=u.usage_goal_minutes,
+                ),
+                mutual_friends=mutual,
+            )
+            for u, mutual in rows
+        ]
+
+    # cost is per matched row; the lookup itself is a single query
+    @strawberry.field(directives=[Cost(weight=0, multiplier="phoneNumbers", max_size=CONTACTS_MAX_NUMBERS)])
+    async def match_contacts(
+        self,
+        info: Info,
+        phone_numbers: List[str],
+        default_country_code: Optional[str] = None,
+    ) -> List[ContactMatch]:
+        """Which address-book numbers belong to registered users, and whether the caller is connected to them."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        by_e164 = _normalized_contacts(phone_numbers, default_country_code)
+        matches = await match_phone_numbers(session, cu.id, list(by_e164))
+        return [
+            ContactMatch(
+                phone_number=by_e164[u.phone_number],
+                user=User(
+                    id=str(u.id),
+                    name=u.name,
+                    phone_number=u.phone_number,
+                    usage_goal_minutes=u.usage_goal_minutes,
+                ),
+                connected=connected,
+            )
+            for u, connected in matches
+        ]
 
 @strawberry.type
 class Mutation:
@@ -149,9 +407,18 @@ class Mutation:
             user.name = data.name
         if data.usage_goal_minutes is not None:
             user.usage_goal_minutes = data.usage_goal_minutes
+        if data.timezone is not None:
+            try:
+                ZoneInfo(data.timezone)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError("Unknown timezone")
+            user.timezone = data.timezone
 
         await session.commit()
         await session.refresh(user)
+        # name and goal show up on every board this user is part of
+        leaderboard_cache.invalidate_member(user.id)
+        await bump_versions(user.id)
 
         return User(
             id=str(user.id),
@@ -212,6 +479,9 @@ class Mutation:
 
         session.add_all([conn1, conn2])
         await session.commit()
+        leaderboard_cache.invalidate_viewer(user.id)
+        leaderboard_cache.invalidate_viewer(other_user.id)
+        await bump_versions(user.id, other_user.id)
 
         return User(
             id=str(other_user.id),
@@ -220,6 +490,40 @@ class Mutation:
             usage_goal_minutes=other_user.usage_goal_minutes,
         )
 
+    @strawberry.mutation(directives=[Cost(weight=0, multiplier="phoneNumbers", max_size=CONTACTS_MAX_NUMBERS)])
+    async def add_contacts(
+        self,
+        info: Info,
+        phone_numbers: List[str],
+        default_country_code: Optional[str] = None,
+    ) -> List[User]:
+        """Connect to every registered user in an address book; returns only the newly added contacts."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        by_e164 = _normalized_contacts(phone_numbers, default_country_code)
+        matches = await match_phone_numbers(session, cu.id, list(by_e164))
+        added = set(await connect_all(session, cu.id, [u.id for u, connected in matches if not connected]))
+        await session.commit()
+        if added:
+            leaderboard_cache.invalidate_viewer(cu.id)
+            for other_id in added:
+                leaderboard_cache.invalidate_viewer(other_id)
+            await bump_versions(cu.id, *added)
+
+        return [
+            User(
+                id=str(u.id),
+                name=u.name,
+                phone_number=u.phone_number,
+                usage_goal_minutes=u.usage_goal_minutes,
+            )
+            for u, _ in matches
+            if u.id in added
+        ]
+
     @strawberry.mutation
     async def add_daily_usage(
         self,
@@ -228,20 +532,90 @@ class Mutation:
         date_: date,
         total_ms: int,
     ) -> bool:
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+        if str(user_id) != str(cu.id):
+            raise PermissionError("Not allowed to write other users’ usage")
+
         session = info.context["session"]
-        row = (await session.execute(
-            select(UsageDaily).where(
-                UsageDaily.user_id == user_id, UsageDaily.date == date_
-            )
-        )).scalar_one_or_none()
+        _, weekly = await upsert_daily_usage(session, [(uuid.UUID(str(user_id)), date_, total_ms)])
+        await session.commit()
+        leaderboard_cache.invalidate_member(uuid.UUID(str(user_id)), week_start_of(date_))
+        await bump_versions(user_id)
+        await publish_weekly_totals(weekly)
+        return True
+
+    @strawberry.mutation(directives=[Cost(weight=1, multiplier="entries", max_size=USAGE_BATCH_MAX_SIZE)])
+    async def add_daily_usage_batch(
+        self,
+        info: Info,
+        entries: List[DailyUsageInput],
+    ) -> List[DailyUsageResult]:
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+        if any(str(e.user_id) != str(cu.id) for e in entries):
+            raise PermissionError("Not allowed to write other users’ usage")
 
-        if row:
-            row.total_ms = total_ms
-        else:
-            session.add(UsageDaily(user_id=user_id, date=date_, total_ms=total_ms))
+        session = info.context["session"]
+        keyed = [(uuid.UUID(str(e.user_id)), e.date_, e.total_ms) for e in entries]
 
+        # one upsert statement, one transaction for the whole backlog
+        written, weekly = await upsert_daily_usage(session, keyed)
         await session.commit()
-        return True
+        for user_id, day in written:
+            leaderboard_cache.invalidate_member(user_id, week_start_of(day))
+        await bump_versions(*{user_id for user_id, _ in written})
+        await publish_weekly_totals(weekly)
+
+        results = []
+        for user_id, day, _ in keyed:
+            total_ms, inserted = written[(user_id, day)]
+            results.append(DailyUsageResult(
+                user_id=str(user_id),
+                date_=day,
+                total_ms=total_ms,
+                inserted=inserted,
+            ))
+        return results
+
+    @strawberry.mutation(directives=[Cost(weight=1, multiplier="entries", max_size=USAGE_BATCH_MAX_SIZE)])
+    async def add_daily_app_usage_batch(
+        self,
+        info: Info,
+        entries: List[DailyAppUsageInput],
+    ) -> List[DailyUsageResult]:
+        """Per-app usage for many days; each day's total is the sum of its apps."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+        if any(str(e.user_id) != str(cu.id) for e in entries):
+            raise PermissionError("Not allowed to write other users’ usage")
+
+        session = info.context["session"]
+        keyed = [
+            (uuid.UUID(str(e.user_id)), e.date_, app_totals((a.app, a.ms) for a in e.apps))
+            for e in entries
+        ]
+
+        written, weekly = await upsert_daily_app_usage(session, keyed)
+        await session.commit()
+        for user_id, day in written:
+            leaderboard_cache.invalidate_member(user_id, week_start_of(day))
+        await bump_versions(*{user_id for user_id, _ in written})
+        await publish_weekly_totals(weekly)
+
+        results = []
+        for user_id, day, _ in keyed:
+            total_ms, inserted = written[(user_id, day)]
+            results.append(DailyUsageResult(
+                user_id=str(user_id),
+                date_=day,
+                total_ms=total_ms,
+                inserted=inserted,
+            ))
+        return results
 
     @strawberry.mutation
     async def register(self, info: Info, data: RegisterInput) -> Me:
@@ -257,7 +631,7 @@ class Mutation:
             name=data.name,
             phone_number=data.phone_number,
             usage_goal_minutes=data.usage_goal_minutes,
-            password_hash=hash_password(data.password),
+            password_hash=await hash_password_async(data.password),
         )
         session.add(user)
         await session.commit()
@@ -271,24 +645,98 @@ class Mutation:
             select(UserModel).where(UserModel.phone_number == data.phone_number)
         )
         user = q.scalar_one_or_none()
-        if not user or not user.is_active or not verify_password(data.password, user.password_hash):
+        if not user or not user.is_active:
+            raise ValueError("Invalid credentials")
+        ok, new_hash = await verify_and_update_password_async(data.password, user.password_hash)
+        if not ok:
             raise ValueError("Invalid credentials")
+        if new_hash:
+            # cost parameters changed since this hash was made; upgrade it transparently
+            user.password_hash = new_hash
+            await session.commit()
 
         return AuthPayload(
             access_token=create_access_token(user.id),
             refresh_token=create_refresh_token(user.id),
         )
     
+    @strawberry.mutation
+    async def logout(self, info: Info, refresh_token: Optional[str] = None) -> bool:
+        """Revoke the bearer access token of this request and, if given, the caller's refresh token."""
+        cu = info.context.get("current_user")
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        session = info.context["session"]
+        # no request (in-process execution) means no bearer token to revoke
+        request = info.context.get("request")
+        auth = request.headers.get("Authorization", "") if request is not None else ""
+        tokens = [auth.split(" ", 1)[1]] if auth.startswith("Bearer ") else []
+        if refresh_token:
+            tokens.append(refresh_token)
+        for token in tokens:
+            payload = decode_token(token)
+            if payload and payload.get("sub") == str(cu.id):
+                await revocation_list.revoke(session, payload)
+        await session.commit()
+        return True
+
     @strawberry.mutation
     async def refresh_token(self, info: Info, refresh_token: str) -> AuthPayload:
         payload = decode_token(refresh_token)
         if not payload or payload.get("type") != "refresh":
             raise ValueError("Invalid refresh token")
         user_id = payload.get("sub")
-        # (optional) check user still active, token revocation list, etc.
+        session = info.context["session"]
+        if await revocation_list.is_revoked(payload.get("jti"), session):
+            raise ValueError("Invalid refresh token")
+        user = await session.get(UserModel, user_id)
+        if not user or not user.is_active:
+            raise ValueError("Invalid refresh token")
         return AuthPayload(
             access_token=create_access_token(user_id),
             refresh_token=create_refresh_token(user_id),
         )
 
-schema = strawberry.Schema(query=Query, mutation=Mutation, types=[User, WeeklyProgress])
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def friend_progress(self, info: Info) -> AsyncGenerator[FriendProgressEvent, None]:
+        """A friend's new weekly total every time they upload usage."""
+        cu = info.context.get("current_user")
+        if not cu:
+            # websocket clients usually authenticate in connection_init rather than headers
+            params = info.context.get("connection_params") or {}
+            auth = params.get("Authorization") or params.get("authorization") or ""
+            if auth.startswith("Bearer "):
+                cu = await verify_token(auth[7:])
+        if not cu:
+            raise PermissionError("Authentication required")
+
+        # short-lived session: the subscription itself may stay open for hours
+        async with SessionLocal() as session:
+            friend_ids = (await session.execute(
+                select(ConnModel.other_user_id).where(
+                    ConnModel.user_id == cu.id, ConnModel.status == ConnectionStatus.accepted
+                )
+            )).scalars().all()
+
+        sub = await broker.subscribe(str(fid) for fid in friend_ids)
+        try:
+            async for m in sub:
+                yield FriendProgressEvent(
+                    user_id=m["user_id"],
+                    week_start=date.fromisoformat(m["week_start"]),
+                    total_ms=m["total_ms"],
+                )
+        finally:
+            await sub.close()
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    types=[User, WeeklyProgress, Friend, UserSearchPage, LeaderboardEntry, FriendProgressEvent, ContactMatch, AppUsage, SuggestedContact],
+    # CostLimiter must come after DocumentCache, which clears errors on cache hits
+    extensions=[QueryMetrics, AdmissionControl, DocumentCache, CostLimiter, ReadRouting],
+)
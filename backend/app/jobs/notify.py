@@ -0,0 +1,38 @@
+# app/jobs/notify.py
+"""
+Outbox delivery worker.
+
+    python -m app.jobs.notify --batch-size 500 --concurrency 20
+
+The provider comes from NOTIFICATION_SENDER ("log", "fake", or
+"package.module:factory"). Several workers can run side by side because
+batches are claimed with FOR UPDATE SKIP LOCKED.
+"""
+import argparse
+import asyncio
+
+from app.notifications.outbox import OutboxWorker
+from app.notifications.senders import load_sender
+
+
+async def main(args) -> None:
+    worker = OutboxWorker(
+        load_sender(),
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+    )
+    if args.once:
+        await worker.run_once()
+    else:
+        await worker.run_forever(args.idle_sleep)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20, help="provider calls in flight")
+    parser.add_argument("--max-attempts", type=int, default=8)
+    parser.add_argument("--idle-sleep", type=float, default=1.0)
+    parser.add_argument("--once", action="store_true", help="drain a single batch and exit")
+    asyncio.run(main(parser.parse_args()))
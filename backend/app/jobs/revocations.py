@@ -0,0 +1,40 @@
+# app/jobs/revocations.py
+"""
+Purge revoked token ids whose tokens have expired.
+
+    python -m app.jobs.revocations               # purge once
+    python -m app.jobs.revocations --every 3600  # keep purging hourly
+
+Workers rebuild their Bloom filters from the unexpired rows only, so this just
+keeps revoked_tokens small; it never changes which tokens are accepted.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.auth.revocation import purge_expired
+from app.db.sessions import SessionLocal
+
+
+async def purge_once() -> int:
+    """Returns the number of rows deleted."""
+    async with SessionLocal() as session:
+        purged = await purge_expired(session)
+        await session.commit()
+    print(f"purged {purged} expired revoked token ids")
+    return purged
+
+
+async def main(args) -> None:
+    while True:
+        await purge_once()
+        if not args.every:
+            return
+        await asyncio.sleep(args.every)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--every", type=int, default=0, help="purge again every N seconds")
+    asyncio.run(main(parser.parse_args()))
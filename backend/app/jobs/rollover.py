@@ -0,0 +1,170 @@
+# app/jobs/rollover.py
+"""
+Weekly target evaluation (ARCHITECTURE.md §9).
+
+    python -m app.jobs.rollover                # evaluate every cohort that is due, once
+    python -m app.jobs.rollover --every 900    # keep checking every 15 minutes
+
+Users are bucketed by timezone. Once a zone has passed Monday 00:00 local
+time, its users are evaluated for the week that just ended. Each cohort is
+streamed in user-id order through a server-side cursor. Every chunk takes one
+grouped query over usage_daily to decide who stayed within
+usage_goal_minutes, and then commits a checkpoint, so a crashed run resumes
+after the last finished chunk. Users who met their target get goal_met
+outbox rows in the same transaction, which app.jobs.notify delivers.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import JobCheckpoint, UsageDaily, User as UserModel
+from app.db.sessions import SessionLocal
+from app.db.usage import week_start_of
+from app.notifications.outbox import enqueue_goal_met
+
+JOB_NAME = "week_rollover"
+
+# Called inside each chunk's transaction with {user_id: total_ms} of the users who met their target.
+AchievedHandler = Callable[[AsyncSession, date, Mapping[uuid.UUID, int]], Awaitable[object]]
+
+
+async def _ignore(session: AsyncSession, week_start: date, achieved: Mapping[uuid.UUID, int]) -> None:
+    return None
+
+
+def evaluated_week(tz: str, now: datetime) -> Optional[date]:
+    """Monday of the last fully finished local week in `tz`, or None for an unknown zone."""
+    try:
+        local_today = now.astimezone(ZoneInfo(tz)).date()
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return week_start_of(local_today) - timedelta(days=7)
+
+
+async def achieved_in_chunk(session: AsyncSession, user_ids: Sequence[uuid.UUID], week_start: date) -> Dict[uuid.UUID, int]:
+    """{user_id: total_ms} for users in the chunk with recorded usage at or under their goal, in one grouped query."""
+    rows = await session.execute(
+        select(UsageDaily.user_id, func.sum(UsageDaily.total_ms))
+        .join(UserModel, UserModel.id == UsageDaily.user_id)
+        .where(UsageDaily.user_id.in_(user_ids))
+        .where(UsageDaily.date >= week_start)
+        .where(UsageDaily.date < week_start + timedelta(days=7))
+        .group_by(UsageDaily.user_id, UserModel.usage_goal_minutes)
+        .having(func.sum(UsageDaily.total_ms) <= UserModel.usage_goal_minutes * 60_000)
+    )
+    return {user_id: int(total) for user_id, total in rows.all()}
+
+
+async def _load_checkpoint(session: AsyncSession, cohort: str, week_start: date) -> JobCheckpoint:
+    await session.execute(
+        pg_insert(JobCheckpoint)
+        .values(job=JOB_NAME, cohort=cohort, week_start=week_start)
+        .on_conflict_do_nothing()
+    )
+    await session.commit()
+    return await session.get(JobCheckpoint, (JOB_NAME, cohort, week_start))
+
+
+async def evaluate_cohort(
+    tz: str,
+    week_start: date,
+    chunk_size: int = 1000,
+    on_achieved: AchievedHandler = _ignore,
+) -> int:
+    """Evaluate one timezone cohort for one week. Returns users processed in this call."""
+    async with SessionLocal() as writer:
+        cp = await _load_checkpoint(writer, tz, week_start)
+        if cp.done:
+            return 0
+        last_id = cp.last_user_id
+
+        processed = 0
+        achieved_total = 0
+        started = time.perf_counter()
+        q = (
+            select(UserModel.id)
+            .where(UserModel.timezone == tz, UserModel.is_active.is_(True), UserModel.usage_goal_minutes > 0)
+            .order_by(UserModel.id)
+        )
+        if last_id is not None:
+            q = q.where(UserModel.id > last_id)
+
+        # the reader holds a server-side cursor; chunks are written and checkpointed on `writer`
+        async with SessionLocal() as reader:
+            result = await reader.stream_scalars(q.execution_options(yield_per=chunk_size))
+            async for ids in result.partitions(chunk_size):
+                achieved = await achieved_in_chunk(writer, ids, week_start)
+                if achieved:
+                    await on_achieved(writer, week_start, achieved)
+                cp.last_user_id = ids[-1]
+                cp.processed += len(ids)
+                cp.updated_at = func.now()
+                await writer.commit()
+
+                processed += len(ids)
+                achieved_total += len(achieved)
+                rate = processed / (time.perf_counter() - started)
+                print(f"[{tz} {week_start}] {cp.processed} users, {achieved_total} achieved, {rate:.0f} users/s")
+
+        cp.done = True
+        cp.updated_at = func.now()
+        await writer.commit()
+
+    elapsed = time.perf_counter() - started
+    print(f"[{tz} {week_start}] done: {processed} users in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.0f} users/s)")
+    return processed
+
+
+async def run_due_cohorts(
+    now: Optional[datetime] = None,
+    chunk_size: int = 1000,
+    on_achieved: AchievedHandler = _ignore,
+) -> int:
+    """Evaluate every timezone that has crossed Monday 00:00 since its last evaluated week."""
+    now = now or datetime.now(dt_timezone.utc)
+    async with SessionLocal() as session:
+        zones = (await session.execute(select(UserModel.timezone).distinct())).scalars().all()
+        finished = set(
+            (await session.execute(
+                select(JobCheckpoint.cohort, JobCheckpoint.week_start)
+                .where(JobCheckpoint.job == JOB_NAME, JobCheckpoint.done.is_(True))
+                .where(JobCheckpoint.week_start >= now.date() - timedelta(days=14))
+            )).all()
+        )
+
+    total = 0
+    for tz in sorted(zones):
+        week_start = evaluated_week(tz, now)
+        if week_start is None:
+            print(f"skipping unknown timezone {tz!r}")
+            continue
+        if (tz, week_start) in finished:
+            continue
+        total += await evaluate_cohort(tz, week_start, chunk_size, on_achieved)
+    return total
+
+
+async def main(args) -> None:
+    while True:
+        # friends are notified through the outbox, written in each chunk's transaction
+        await run_due_cohorts(chunk_size=args.chunk_size, on_achieved=enqueue_goal_met)
+        if not args.every:
+            return
+        await asyncio.sleep(args.every)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--every", type=int, default=0, help="re-check for due cohorts every N seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+# app/jobs/suggestions.py
+"""
+Precompute friend-of-friend suggestions for high-degree users.
+
+    python -m app.jobs.suggestions                 # refresh once
+    python -m app.jobs.suggestions --every 3600    # keep refreshing hourly
+
+Users with at least --min-degree accepted connections get their top
+--per-user candidates rewritten in contact_suggestions, --chunk-size users
+per transaction. suggestedContacts serves those rows instead of running the
+live query. Users who dropped below the threshold lose their rows at the end
+of the run and go back to the live query.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.db.sessions import SessionLocal
+from app.db.suggestions import drop_suggestions_except, heavy_users, refresh_suggestions
+
+
+async def refresh_heavy_users(min_degree: int = 200, per_user: int = 100, chunk_size: int = 100) -> int:
+    """Returns the number of users refreshed."""
+    started = time.perf_counter()
+    async with SessionLocal() as session:
+        user_ids = await heavy_users(session, min_degree)
+
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        async with SessionLocal() as session:
+            written += await refresh_suggestions(session, user_ids[start:start + chunk_size], per_user)
+            await session.commit()
+
+    async with SessionLocal() as session:
+        dropped = await drop_suggestions_except(session, user_ids)
+        await session.commit()
+    print(
+        f"refreshed {len(user_ids)} users with >= {min_degree} connections: "
+        f"{written} suggestions, {dropped} stale rows dropped, {time.perf_counter() - started:.1f}s"
+    )
+    return len(user_ids)
+
+
+async def main(args) -> None:
+    while True:
+        await refresh_heavy_users(args.min_degree, args.per_user, args.chunk_size)
+        if not args.every:
+            return
+        await asyncio.sleep(args.every)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-degree", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=100, help="candidates stored per user")
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--every", type=int, default=0, help="refresh again every N seconds")
+    asyncio.run(main(parser.parse_args()))
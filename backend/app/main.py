@@ -1,26 +1,45 @@
-from fastapi import Depends, FastAPI, Request
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.requests import HTTPConnection
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
 
 from app.graphql.schema import schema as graphql_schema
-from app.db.sessions import SessionLocal, get_session
-from app.auth.auth import verify_token
+from app.graphql.persisted import PersistedQueryRouter, document_cache_stats
+from app.graphql.admission import admission_stats
+from app.graphql.etag import ConditionalGetMiddleware, etag_stats
+from app.db.replica import replica_router
+from app.db.sessions import get_session, pool_status
+from app.auth.auth import password_pool, verify_token
+from app.auth.cache import principal_cache
+from app.auth.revocation import revocation_list
+from app.metrics import render_metrics
+from app.pubsub import broker
 
 
 app = FastAPI(title="Soberup API", version="0.1.0")
 
-async def get_context(request: Request, session = Depends(get_session)):
+GRAPHQL_PATH = "/api/v1/graphql"
+
+async def get_context(request: HTTPConnection, session = Depends(get_session)):
     auth = request.headers.get("Authorization")
     current_user = None
     if auth and auth.startswith("Bearer "):
         token = auth.split(" ", 1)[1]
         try:
-            current_user = await verify_token(token)
+            current_user = await verify_token(token, session)
         except Exception as e:
             print("Token verification failed:", e)
 
-    return {"request": request, "current_user": current_user, "session": SessionLocal()}
+    if request.scope["type"] == "websocket":
+        # subscriptions can stay open for hours; don't pin a pooled connection to them
+        await session.close()
+
+    # every resolver in this request shares `session`; get_session closes it afterwards
+    return {"request": request, "current_user": current_user, "session": session}
 
+# answers repeat GET queries for unchanged data with 304 before any GraphQL work;
+# added before CORS so CORS stays outermost and its headers reach 304s too
+app.add_middleware(ConditionalGetMiddleware, path=GRAPHQL_PATH)
 # Allow all origins for now during development. Tighten in production.
 app.add_middleware(
 	CORSMiddleware,
@@ -34,12 +53,65 @@ app.add_middleware(
 async def health():
     return {"ok": True}
 
+@app.on_event("shutdown")
+async def stop_password_pool():
+    password_pool.shutdown()
+
+@app.on_event("shutdown")
+async def stop_pubsub():
+    await broker.backend.close()
+
+@app.get("/stats/pool")
+async def db_pool_stats():
+    return pool_status()
+
+@app.get("/stats/graphql")
+async def graphql_document_stats():
+    return document_cache_stats.as_dict()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    pool = pool_status()
+    docs = document_cache_stats.as_dict()
+    principals = principal_cache.stats()
+    revoked = revocation_list.stats()
+    routing = replica_router.stats()
+    return render_metrics([
+        ("db_pool_checked_out", "gauge", pool["checked_out"]),
+        ("db_pool_overflow", "gauge", pool["overflow"]),
+        ("db_pool_waiting", "gauge", pool["waiting"]),
+        ("db_pool_checkouts_total", "counter", pool["checkouts"]),
+        ("db_pool_timeouts_total", "counter", pool["timeouts"]),
+        ("db_pool_wait_max_seconds", "gauge", pool["wait_max_ms"] / 1000),
+        ("db_replica_lag_seconds", "gauge", routing["lag_seconds"]),
+        ("db_replica_reads_total", "counter", routing["replica"]),
+        ("db_replica_skipped_recent_write_total", "counter", routing["primary_recent_write"]),
+        ("db_replica_skipped_lagging_total", "counter", routing["primary_lagging"]),
+        ("graphql_document_cache_hits_total", "counter", docs["hits"]),
+        ("graphql_document_cache_misses_total", "counter", docs["misses"]),
+        ("graphql_parse_validate_saved_seconds_total", "counter", docs["parse_validate_ms_saved"] / 1000),
+        ("principal_cache_hits_total", "counter", principals["hits"]),
+        ("principal_cache_misses_total", "counter", principals["misses"]),
+        ("token_revocation_filter_entries", "gauge", revoked["filter_entries"]),
+        ("token_revocation_checks_total", "counter", revoked["checks"]),
+        ("token_revocation_filter_hits_total", "counter", revoked["filter_hits"]),
+        ("token_revocation_false_positives_total", "counter", revoked["false_positives"]),
+        ("password_hash_pending", "gauge", password_pool.pending),
+        ("password_hash_rejected_total", "counter", password_pool.rejected),
+        ("graphql_rate_limited_total", "counter", admission_stats.limited),
+        ("graphql_shed_total", "counter", admission_stats.shed),
+        ("graphql_not_modified_total", "counter", etag_stats.not_modified),
+        ("graphql_etag_tagged_total", "counter", etag_stats.tagged),
+        ("pubsub_topics", "gauge", broker.stats()["topics"]),
+        ("pubsub_delivered_total", "counter", broker.delivered),
+    ])
+
 
-graphql_app = GraphQLRouter(
+graphql_app = PersistedQueryRouter(
     graphql_schema,
     graphiql=True,
     context_getter=get_context
 )
-app.include_router(graphql_app, prefix="/api/v1/graphql")
+app.include_router(graphql_app, prefix=GRAPHQL_PATH)
 
 
@@ -0,0 +1,193 @@
+# app/notifications/outbox.py
+from __future__ import annotations
+
+import asyncio
+import random
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Mapping, Tuple
+
+from sqlalchemy import BigInteger, Boolean, Interval, String, bindparam, case, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Connection as ConnModel, ConnectionStatus, OutboxMessage, User as UserModel
+from app.db.sessions import SessionLocal
+from app.notifications.senders import PushNotification, PushSender
+
+GOAL_MET = "goal_met"
+
+
+async def enqueue_goal_met(session: AsyncSession, week_start: date, totals: Mapping[uuid.UUID, int]) -> int:
+    """
+    Queue a goal_met message to every accepted connection of each user in `totals`
+    ({user_id: total_ms}). Runs in the caller's transaction; nothing is sent here.
+    Re-enqueueing the same user and week is a no-op. One INSERT ... SELECT with the
+    totals as two array parameters, so the fan-out never meets the bind parameter
+    limit however many connections the users have. Returns the messages queued.
+    """
+    if not totals:
+        return 0
+    user_ids = list(totals)
+    achieved = func.unnest(
+        bindparam("user_ids", user_ids, type_=ARRAY(UUID(as_uuid=True))),
+        bindparam("totals", [totals[u] for u in user_ids], type_=ARRAY(BigInteger)),
+    ).table_valued("user_id", "total_ms").render_derived("achieved")
+    week = week_start.isoformat()
+    messages = (
+        select(
+            literal(GOAL_MET),
+            ConnModel.other_user_id,
+            func.concat(f"{GOAL_MET}:", cast(UserModel.id, String), f":{week}"),
+            func.jsonb_build_object(
+                "user_id", cast(UserModel.id, String),
+                "name", UserModel.name,
+                "week_start", week,
+                "total_ms", achieved.c.total_ms,
+                "goal_minutes", UserModel.usage_goal_minutes,
+            ),
+        )
+        .select_from(achieved)
+        .join(UserModel, UserModel.id == achieved.c.user_id)
+        .join(ConnModel, ConnModel.user_id == achieved.c.user_id)
+        .where(ConnModel.status == ConnectionStatus.accepted)
+    )
+    result = await session.execute(
+        pg_insert(OutboxMessage)
+        .from_select(["kind", "recipient_id", "dedupe_key", "payload"], messages)
+        .on_conflict_do_nothing(constraint="uq_outbox_recipient_dedupe")
+    )
+    return result.rowcount
+
+
+def render(recipient_id: uuid.UUID, payloads: List[Dict[str, Any]]) -> PushNotification:
+    """Fold everything pending for one recipient into a single push."""
+    if len(payloads) == 1:
+        p = payloads[0]
+        hours = p["total_ms"] / 3_600_000
+        body = f"{p['name']} met their weekly target: {hours:.1f}/{p['goal_minutes'] / 60:.1f}h"
+    else:
+        body = f"{len(payloads)} friends met their weekly target"
+    return PushNotification(recipient_id=recipient_id, body=body, items=payloads)
+
+
+class OutboxWorker:
+    """
+    Drains the outbox in batches. Claimed rows are leased (pushed into the future)
+    and committed before any provider call, so no connection is held while sending
+    and a crashed worker's rows become visible again when the lease runs out.
+    """
+
+    def __init__(
+        self,
+        sender: PushSender,
+        batch_size: int = 500,
+        concurrency: int = 20,
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_max: float = 3600.0,
+        lease_seconds: float = 120.0,
+    ):
+        self.sender = sender
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def _claim(self) -> List[Tuple[int, uuid.UUID, Dict[str, Any], int]]:
+        due = (
+            select(OutboxMessage.id)
+            .where(
+                OutboxMessage.sent_at.is_(None),
+                OutboxMessage.failed_at.is_(None),
+                OutboxMessage.available_at <= func.now(),
+            )
+            .order_by(OutboxMessage.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with SessionLocal() as session:
+            rows = (await session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(due.scalar_subquery()))
+                .values(
+                    available_at=func.now() + timedelta(seconds=self.lease_seconds),
+                    attempts=OutboxMessage.attempts + 1,
+                )
+                .returning(OutboxMessage.id, OutboxMessage.recipient_id, OutboxMessage.payload, OutboxMessage.attempts)
+            )).all()
+            await session.commit()
+        return [tuple(r) for r in rows]
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base ** attempts)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run_once(self) -> int:
+        """Claim, send and settle one batch. Returns the number of outbox rows claimed."""
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+
+        by_recipient: Dict[uuid.UUID, List[Tuple[int, Dict[str, Any], int]]] = defaultdict(list)
+        for msg_id, recipient_id, payload, attempts in claimed:
+            by_recipient[recipient_id].append((msg_id, payload, attempts))
+
+        sem = asyncio.Semaphore(self.concurrency)
+        delivered: List[int] = []
+        retry: List[Dict[str, Any]] = []
+
+        async def deliver(recipient_id: uuid.UUID, msgs: List[Tuple[int, Dict[str, Any], int]]) -> None:
+            async with sem:
+                try:
+                    await self.sender.send(render(recipient_id, [m[1] for m in msgs]))
+                except Exception as e:
+                    for msg_id, _, attempts in msgs:
+                        give_up = attempts >= self.max_attempts
+                        retry.append({
+                            "msg_id": msg_id,
+                            "delay": timedelta(seconds=self._backoff(attempts)),
+                            "give_up": give_up,
+                            "error": str(e)[:500],
+                        })
+                    return
+            delivered.extend(m[0] for m in msgs)
+
+        await asyncio.gather(*(deliver(r, m) for r, m in by_recipient.items()))
+
+        async with SessionLocal() as session:
+            if delivered:
+                await session.execute(
+                    update(OutboxMessage).where(OutboxMessage.id.in_(delivered)).values(sent_at=func.now())
+                )
+            if retry:
+                # times come from the database clock, like the lease in _claim; a Core
+                # statement on the table, since ORM bulk updates only match on the primary key
+                outbox = OutboxMessage.__table__
+                await session.execute(
+                    update(outbox)
+                    .where(outbox.c.id == bindparam("msg_id"))
+                    .values(
+                        available_at=func.now() + bindparam("delay", type_=Interval),
+                        failed_at=case((bindparam("give_up", type_=Boolean), func.now())),
+                        last_error=bindparam("error"),
+                    ),
+                    retry,
+                )
+            await session.commit()
+
+        self.sent += len(delivered)
+        self.failed += sum(1 for r in retry if r["give_up"])
+        self.retried += sum(1 for r in retry if not r["give_up"])
+        return len(claimed)
+
+    async def run_forever(self, idle_sleep: float = 1.0) -> None:
+        while True:
+            if await self.run_once() < self.batch_size:
+                await asyncio.sleep(idle_sleep)
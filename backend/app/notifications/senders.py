@@ -0,0 +1,64 @@
+# app/notifications/senders.py
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
+
+# "log", "fake", or "package.module:factory" for a real provider (e.g. FCM)
+NOTIFICATION_SENDER = os.getenv("NOTIFICATION_SENDER", "log")
+
+
+@dataclass
+class PushNotification:
+    recipient_id: uuid.UUID
+    body: str
+    # the outbox payloads folded into this notification
+    items: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class PushError(Exception):
+    pass
+
+
+class PushSender(Protocol):
+    async def send(self, notification: PushNotification) -> None:
+        """Deliver one notification; raise to have it retried with backoff."""
+        ...
+
+
+class LogPushSender:
+    async def send(self, notification: PushNotification) -> None:
+        print(f"push -> {notification.recipient_id}: {notification.body}")
+
+
+class FakePushSender:
+    """Stand-in provider for tests and benchmarks: fixed latency, optional random failures."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent: List[PushNotification] = []
+        self._rng = random.Random(seed)
+
+    async def send(self, notification: PushNotification) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise PushError("fake provider failure")
+        self.sent.append(notification)
+
+
+def load_sender(spec: str = NOTIFICATION_SENDER) -> PushSender:
+    if spec == "log":
+        return LogPushSender()
+    if spec == "fake":
+        return FakePushSender()
+    module, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"NOTIFICATION_SENDER must be 'log', 'fake' or 'module:factory', got {spec!r}")
+    return getattr(importlib.import_module(module), attr)()
@@ -0,0 +1,28 @@
+# app/phone.py
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+_SEPARATORS = re.compile(r"[\s\-(). /]")
+
+
+def normalize_e164(raw: str, default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    Best-effort E.164 form of an address-book entry, or None if it cannot be one.
+
+    "+49 151 2345-678" and "0049 1512345678" become "+491512345678". A national
+    number ("0151 2345678") needs `default_country_code` ("49"); its trunk 0 is dropped.
+    """
+    s = _SEPARATORS.sub("", raw or "")
+    if s.startswith("00"):
+        s = "+" + s[2:]
+    if not s.startswith("+"):
+        if not default_country_code or not s.isdigit():
+            return None
+        s = "+" + default_country_code.lstrip("+") + s.lstrip("0")
+    digits = s[1:]
+    # E.164: at most 15 digits, country codes never start with 0
+    if not digits.isdigit() or not 8 <= len(digits) <= 15 or digits[0] == "0":
+        return None
+    return s
@@ -0,0 +1,156 @@
+# app/pubsub.py
+"""
+In-process pub/sub keyed by topic (a user id), used for GraphQL subscriptions.
+
+Each subscriber gets a bounded queue; when a slow consumer falls behind, the
+oldest undelivered message is dropped instead of growing memory or blocking
+publishers. With several workers, set PUBSUB_BACKEND to a redis:// URL so a
+publish on any worker reaches subscribers on all of them (needs the `redis`
+package); the default in-memory backend only fans out within the process.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Set
+
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "memory")
+PUBSUB_QUEUE_SIZE = int(os.getenv("PUBSUB_QUEUE_SIZE", "100"))
+
+Message = Dict[str, Any]
+Deliver = Callable[[str, Message], None]
+
+
+class InMemoryBackend:
+    def __init__(self) -> None:
+        self.deliver: Optional[Deliver] = None
+
+    async def publish(self, topic: str, message: Message) -> None:
+        self.deliver(topic, message)
+
+    async def subscribe(self, topic: str) -> None:
+        pass
+
+    async def unsubscribe(self, topic: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """Relays through Redis channels; one pubsub connection per worker process."""
+
+    CHANNEL_PREFIX = "soberup:"
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("PUBSUB_BACKEND=redis:// requires the `redis` package") from e
+        self.deliver: Optional[Deliver] = None
+        self._redis = redis.from_url(url)
+        self._pubsub = self._redis.pubsub()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def publish(self, topic: str, message: Message) -> None:
+        await self._redis.publish(self.CHANNEL_PREFIX + topic, json.dumps(message))
+
+    async def subscribe(self, topic: str) -> None:
+        await self._pubsub.subscribe(self.CHANNEL_PREFIX + topic)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, topic: str) -> None:
+        await self._pubsub.unsubscribe(self.CHANNEL_PREFIX + topic)
+
+    async def _read(self) -> None:
+        async for m in self._pubsub.listen():
+            if m["type"] != "message":
+                continue
+            channel = m["channel"].decode() if isinstance(m["channel"], bytes) else m["channel"]
+            self.deliver(channel[len(self.CHANNEL_PREFIX):], json.loads(m["data"]))
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", topics: Set[str], maxsize: int) -> None:
+        self._broker = broker
+        self.topics = topics
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, message: Message) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def __aiter__(self) -> AsyncIterator[Message]:
+        while True:
+            yield await self._queue.get()
+
+    async def close(self) -> None:
+        await self._broker._remove(self)
+
+
+class Broker:
+    def __init__(self, backend=None, queue_size: int = PUBSUB_QUEUE_SIZE) -> None:
+        self.backend = backend or InMemoryBackend()
+        self.backend.deliver = self._deliver
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.published = 0
+        self.delivered = 0
+
+    async def publish(self, topic: str, message: Message) -> None:
+        self.published += 1
+        await self.backend.publish(topic, message)
+
+    def _deliver(self, topic: str, message: Message) -> None:
+        for sub in self._subscribers.get(topic, ()):
+            sub.offer(message)
+            self.delivered += 1
+
+    async def subscribe(self, topics: Iterable[str]) -> Subscription:
+        sub = Subscription(self, set(topics), self.queue_size)
+        for topic in sub.topics:
+            if not self._subscribers[topic]:
+                await self.backend.subscribe(topic)
+            self._subscribers[topic].add(sub)
+        return sub
+
+    async def _remove(self, sub: Subscription) -> None:
+        for topic in sub.topics:
+            subs = self._subscribers.get(topic)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[topic]
+                await self.backend.unsubscribe(topic)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "topics": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+def make_broker(spec: str = PUBSUB_BACKEND) -> Broker:
+    if spec.startswith(("redis://", "rediss://")):
+        return Broker(RedisBackend(spec))
+    if spec == "memory":
+        return Broker(InMemoryBackend())
+    raise ValueError(f"PUBSUB_BACKEND must be 'memory' or a redis:// URL, got {spec!r}")
+
+
+broker = make_broker()
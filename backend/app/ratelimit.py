@@ -0,0 +1,88 @@
+# app/ratelimit.py
+"""
+Token buckets for write admission control.
+
+Buckets live in a bounded in-process LRU by default. A full bucket is the
+same as no bucket, so evicting idle keys only ever errs on the side of
+admitting. Set RATE_LIMIT_BACKEND to a redis:// URL to share buckets
+between workers (needs the `redis` package).
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time); tuples keep each entry small
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        if tokens < burst:
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_TAKE_LUA = """
+local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local ok = 0
+if tokens >= cost then tokens = tokens - cost; ok = 1 end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return ok
+"""
+
+
+class RedisBuckets:
+    PREFIX = "soberup:rl:"
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis:// requires the `redis` package") from e
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_LUA)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> bool:
+        return bool(await self._take(keys=[self.PREFIX + key], args=[rate, burst, time.time(), cost]))
+
+    def __len__(self) -> int:
+        return 0
+
+
+def make_buckets(spec: str = RATE_LIMIT_BACKEND):
+    if spec.startswith(("redis://", "rediss://")):
+        return RedisBuckets(spec)
+    if spec == "memory":
+        return MemoryBuckets()
+    raise ValueError(f"RATE_LIMIT_BACKEND must be 'memory' or a redis:// URL, got {spec!r}")
+
+
+buckets = make_buckets()
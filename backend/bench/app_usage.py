@@ -0,0 +1,137 @@
+# bench/app_usage.py
+"""
+Per-app usage: one row per (user, day, app) vs. parallel arrays per daily row.
+
+    python -m bench.app_usage --users 1000 --days 90 --apps-per-day 50
+
+Builds two scratch tables (bench_app_rows and bench_app_arrays, the latter
+shaped like usage_daily with app_ids/app_ms) holding the same data, then
+reports each one's total size on disk (heap, TOAST and indexes) and the
+latency of
+  * top --top apps of a random user and week, and
+  * a weekly total (the weeklyProgress shape).
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.db.sessions import engine
+from bench.common import Timer, emit, summarize
+
+ROWS = "bench_app_rows"
+ARRAYS = "bench_app_arrays"
+
+QUERIES = {
+    ROWS: {
+        "top_apps": (
+            f"SELECT app_id, sum(ms) AS total FROM {ROWS} "
+            f"WHERE user_id = :u AND date >= :s AND date < :e "
+            f"GROUP BY app_id ORDER BY total DESC LIMIT :n"
+        ),
+        "weekly_total": f"SELECT coalesce(sum(ms), 0) FROM {ROWS} WHERE user_id = :u AND date >= :s AND date < :e",
+    },
+    ARRAYS: {
+        "top_apps": (
+            f"SELECT p.app_id, sum(p.ms) AS total FROM {ARRAYS} d, unnest(d.app_ids, d.app_ms) AS p(app_id, ms) "
+            f"WHERE d.user_id = :u AND d.date >= :s AND d.date < :e "
+            f"GROUP BY p.app_id ORDER BY total DESC LIMIT :n"
+        ),
+        "weekly_total": f"SELECT coalesce(sum(total_ms), 0) FROM {ARRAYS} WHERE user_id = :u AND date >= :s AND date < :e",
+    },
+}
+
+
+async def build(users: int, days: int, apps_per_day: int, catalogue: int, today: date) -> None:
+    first = today - timedelta(days=days - 1)
+    async with engine.begin() as conn:
+        for t in (ROWS, ARRAYS):
+            await conn.execute(text(f"DROP TABLE IF EXISTS {t}"))
+        await conn.execute(text(
+            f"CREATE TABLE {ROWS} (user_id uuid NOT NULL, date date NOT NULL, app_id integer NOT NULL, "
+            f"ms integer NOT NULL, PRIMARY KEY (user_id, date, app_id))"
+        ))
+        await conn.execute(text(
+            f"CREATE TABLE {ARRAYS} (id uuid NOT NULL PRIMARY KEY, user_id uuid NOT NULL, date date NOT NULL, "
+            f"total_ms integer NOT NULL, app_ids integer[], app_ms integer[], UNIQUE (user_id, date))"
+        ))
+        await conn.execute(text(f"CREATE TEMP TABLE bench_users AS SELECT gen_random_uuid() AS user_id FROM generate_series(1, {users})"))
+
+        with Timer() as t:
+            # a different, distinct slice of the app catalogue for every user and day
+            await conn.execute(text(
+                f"INSERT INTO {ROWS} (user_id, date, app_id, ms) "
+                f"SELECT u.user_id, d::date, ((hashtext(u.user_id::text || d::text) & 2147483647)::bigint + k) % :catalogue + 1, "
+                f"(random() * 3600000)::int "
+                f"FROM bench_users u CROSS JOIN generate_series(:first, :last, interval '1 day') d "
+                f"CROSS JOIN generate_series(1, :per_day) k"
+            ), {"first": first, "last": today, "per_day": apps_per_day, "catalogue": catalogue})
+        print(f"loaded {ROWS} in {t.elapsed:.1f}s")
+        with Timer() as t:
+            await conn.execute(text(
+                f"INSERT INTO {ARRAYS} (id, user_id, date, total_ms, app_ids, app_ms) "
+                f"SELECT gen_random_uuid(), user_id, date, sum(ms), array_agg(app_id ORDER BY app_id), array_agg(ms ORDER BY app_id) "
+                f"FROM {ROWS} GROUP BY user_id, date"
+            ))
+        print(f"loaded {ARRAYS} in {t.elapsed:.1f}s")
+        for t in (ROWS, ARRAYS):
+            await conn.execute(text(f"ANALYZE {t}"))
+
+
+async def measure(table: str, query: str, samples: int, top: int, today: date, days: int, rng: random.Random):
+    async with engine.connect() as conn:
+        user_ids = (await conn.execute(text(f"SELECT DISTINCT user_id FROM {ARRAYS} LIMIT 1000"))).scalars().all()
+        latencies = []
+        for _ in range(samples):
+            week = today - timedelta(days=rng.randrange(7, max(8, days)))
+            with Timer() as t:
+                await conn.execute(text(QUERIES[table][query]), {
+                    "u": rng.choice(user_ids), "s": week, "e": week + timedelta(days=7), "n": top,
+                })
+            latencies.append(t.elapsed)
+    return latencies
+
+
+async def main(args) -> None:
+    today = date.today()
+    rng = random.Random(args.seed)
+    await build(args.users, args.days, args.apps_per_day, args.catalogue, today)
+
+    results = []
+    for table in (ROWS, ARRAYS):
+        async with engine.connect() as conn:
+            size = (await conn.execute(text(f"SELECT pg_total_relation_size('{table}')"))).scalar_one()
+            rows = (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar_one()
+        for query in ("top_apps", "weekly_total"):
+            latencies = await measure(table, query, args.samples, args.top, today, args.days, rng)
+            results.append(summarize(
+                f"app_usage.{query}.{table}", latencies, sum(latencies), ops=len(latencies),
+                rows=rows, total_bytes=size,
+            ))
+
+    if not args.keep:
+        async with engine.begin() as conn:
+            for table in (ROWS, ARRAYS):
+                await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--apps-per-day", type=int, default=50)
+    parser.add_argument("--catalogue", type=int, default=500, help="distinct apps across all users")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+    if args.apps_per_day > args.catalogue:
+        parser.error("--apps-per-day cannot exceed --catalogue")
+    asyncio.run(main(args))
@@ -0,0 +1,43 @@
+# bench/auth_cache.py
+"""
+Authenticated request latency with the principal cache on and off.
+
+    python -m bench.auth_cache --requests 2000 --concurrency 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.auth.auth import create_access_token
+from app.auth.cache import principal_cache
+from bench.common import asgi_client, emit, post_gql, run_concurrent, seed_users, summarize
+
+ME = "query { me { id name usageGoalMinutes } }"
+
+
+async def main(args) -> None:
+    users = await seed_users(args.users, prefix="authcache")
+    tokens = [create_access_token(u) for u in users]
+    results = []
+    async with asgi_client() as client:
+        for label, size in (("off", 0), ("on", principal_cache.maxsize or 10000)):
+            principal_cache.clear()
+            principal_cache.maxsize = size
+            principal_cache.hits = principal_cache.misses = 0
+
+            async def op(i: int) -> None:
+                await post_gql(client, ME, token=tokens[i % len(tokens)])
+
+            latencies, elapsed = await run_concurrent(op, args.requests, args.concurrency)
+            results.append(summarize(f"auth_cache.{label}", latencies, elapsed, ops=args.requests,
+                                     concurrency=args.concurrency, **principal_cache.stats()))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100, help="distinct tokens to rotate through")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+# bench/common.py
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.models import User as UserModel
+from app.db.sessions import SessionLocal
+from app.graphql import admission
+from app.graphql.schema import schema
+
+# benches drive many writes as few users; measure the write paths, not the limits in front of them
+admission.RATE_LIMIT_USER_RATE = admission.RATE_LIMIT_IP_RATE = 0
+
+GRAPHQL_PATH = "/api/v1/graphql"
+
+# a real bcrypt hash is not needed for anything that does not log in
+DUMMY_PASSWORD_HASH = "!bench"
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(name: str, latencies: Sequence[float], elapsed: float, ops: int, **extra: Any) -> Dict[str, Any]:
+    """One machine-readable result row. Latencies are seconds, reported in ms."""
+    return {
+        "name": name,
+        "ops": ops,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_ops_s": round(ops / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        **extra,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def emit(results: List[Dict[str, Any]], out: Optional[str] = None) -> None:
+    """Print results as JSON lines, stamped with the commit they ran on; optionally append them to `out`."""
+    stamp = {"commit": git_commit(), "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    lines = [json.dumps({**r, **stamp}) + "\n" for r in results]
+    sys.stdout.writelines(lines)
+    sys.stdout.flush()
+    if out:
+        with open(out, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+async def seed_users(
+    n: int,
+    prefix: str = "bench",
+    password_hash: str = DUMMY_PASSWORD_HASH,
+    names: Optional[Callable[[int], str]] = None,
+) -> List[uuid.UUID]:
+    """Insert n throwaway users and return their ids. `names(i)` overrides the generated names."""
+    run = uuid.uuid4().hex[:8]
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "name": names(i) if names else f"{prefix}-{run}-{i}",
+            "phone_number": f"+999{run}{i:09d}",
+            "password_hash": password_hash,
+            "usage_goal_minutes": 600,
+            "is_active": True,
+        }
+        for i in range(n)
+    ]
+    async with SessionLocal() as session:
+        for start in range(0, len(rows), 1000):
+            await session.execute(pg_insert(UserModel).values(rows[start:start + 1000]))
+        await session.commit()
+    return [r["id"] for r in rows]
+
+
+async def gql(query: str, variables: Optional[Dict[str, Any]] = None, current_user: Any = None) -> Any:
+    """Execute an operation against the schema with a fresh session, like one HTTP request would."""
+    async with SessionLocal() as session:
+        result = await schema.execute(
+            query,
+            variable_values=variables,
+            context_value={"session": session, "current_user": current_user},
+        )
+    if result.errors:
+        raise RuntimeError(result.errors[0].message)
+    return result.data
+
+
+class Timer:
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.elapsed = time.perf_counter() - self.start
+
+
+def asgi_client() -> httpx.AsyncClient:
+    """HTTP client wired straight into the FastAPI app, no network or uvicorn involved."""
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def post_gql(client: httpx.AsyncClient, query: str, variables: Optional[Dict[str, Any]] = None, token: Optional[str] = None) -> Any:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    res = await client.post(GRAPHQL_PATH, json={"query": query, "variables": variables or {}}, headers=headers)
+    res.raise_for_status()
+    body = res.json()
+    if body.get("errors"):
+        raise RuntimeError(body["errors"][0]["message"])
+    return body["data"]
+
+
+async def run_concurrent(op: Callable[[int], Awaitable[Any]], total: int, concurrency: int) -> Tuple[List[float], float]:
+    """Call op(i) for i in range(total) with at most `concurrency` in flight. Returns (latencies, elapsed)."""
+    latencies: List[float] = []
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker() -> None:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            with Timer() as t:
+                await op(i)
+            latencies.append(t.elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
@@ -0,0 +1,60 @@
+# bench/compare.py
+"""
+Compare two JSON-lines benchmark outputs (e.g. from two commits).
+
+    python -m bench.compare base.jsonl head.jsonl --threshold 10
+
+Rows are matched on name, concurrency and entries_per_request/users where
+present. Exits 1 if any throughput dropped or p99 rose by more than
+--threshold percent.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+KEY_FIELDS = ("name", "concurrency", "entries_per_request", "users", "dataset_users", "term")
+
+
+def load(path: str) -> Dict[Tuple, dict]:
+    rows = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            # later lines win, so an appended re-run replaces the earlier one
+            rows[tuple(row.get(k) for k in KEY_FIELDS)] = row
+    return rows
+
+
+def pct_change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(args) -> int:
+    base, head = load(args.base), load(args.head)
+    regressed = False
+    print(f"{'benchmark':<48} {'ops/s':>10} {'Δ%':>7} {'p99 ms':>10} {'Δ%':>7}")
+    for key in sorted(base.keys() & head.keys(), key=str):
+        b, h = base[key], head[key]
+        tp = pct_change(b["throughput_ops_s"], h["throughput_ops_s"])
+        p99 = pct_change(b["p99_ms"], h["p99_ms"])
+        label = " ".join(f"{v}" for v in key if v is not None)
+        flag = ""
+        if tp < -args.threshold or p99 > args.threshold:
+            regressed = True
+            flag = "  <-- regression"
+        print(f"{label:<48} {h['throughput_ops_s']:>10.1f} {tp:>+7.1f} {h['p99_ms']:>10.2f} {p99:>+7.1f}{flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    sys.exit(main(parser.parse_args()))
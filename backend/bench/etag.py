@@ -0,0 +1,54 @@
+# bench/etag.py
+"""
+Conditional GET: full `me { weeklyProgress }` responses vs. 304 revalidations.
+
+    python -m bench.etag --requests 5000 --concurrency 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date
+
+from app.auth.auth import create_access_token
+from app.db.usage import week_start_of
+from bench.common import GRAPHQL_PATH, asgi_client, emit, run_concurrent, seed_users, summarize
+
+QUERY = "query Me($w: Date!) { me { id name weeklyProgress(weekStart: $w) { totalMs percent } } }"
+
+
+async def main(args) -> None:
+    users = await seed_users(args.users, prefix="etag")
+    tokens = [create_access_token(u) for u in users]
+    params = {"query": QUERY, "variables": f'{{"w": "{week_start_of(date.today()).isoformat()}"}}'}
+    results = []
+    async with asgi_client() as client:
+        etags = {}
+        for t in tokens:
+            res = await client.get(GRAPHQL_PATH, params=params, headers={"Authorization": f"Bearer {t}"})
+            res.raise_for_status()
+            etags[t] = res.headers["ETag"]
+
+        for label, conditional in (("full", False), ("not_modified", True)):
+            statuses = {}
+
+            async def op(i: int) -> None:
+                t = tokens[i % len(tokens)]
+                headers = {"Authorization": f"Bearer {t}"}
+                if conditional:
+                    headers["If-None-Match"] = etags[t]
+                res = await client.get(GRAPHQL_PATH, params=params, headers=headers)
+                statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+
+            latencies, elapsed = await run_concurrent(op, args.requests, args.concurrency)
+            results.append(summarize(f"etag.{label}", latencies, elapsed, ops=args.requests,
+                                     concurrency=args.concurrency, statuses={str(k): v for k, v in statuses.items()}))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
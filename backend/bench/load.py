@@ -0,0 +1,123 @@
+# bench/load.py
+"""
+Drive the API through the real ASGI app against a dataset from bench.seed.
+
+    python -m bench.seed --users 10000
+    python -m bench.load --users 10000 --requests 2000 --concurrency 1 10 50 --out results.jsonl
+
+Every scenario x concurrency pair produces one JSON line with throughput,
+p50/p95/p99 and error count, stamped with the current commit. Compare two
+runs with bench.compare.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict
+
+from app.auth.auth import create_access_token
+from app.db.usage import week_start_of
+from bench.common import asgi_client, emit, post_gql, run_concurrent, summarize
+from bench.seed import LOAD_PASSWORD, load_phone, load_user_id
+
+LOGIN = """
+mutation Login($phone: String!, $password: String!) {
+  login(data: { phoneNumber: $phone, password: $password }) { accessToken }
+}
+"""
+ADD_DAILY_USAGE = """
+mutation AddDailyUsage($userId: ID!, $day: Date!, $totalMs: Int!) {
+  addDailyUsage(userId: $userId, date_: $day, totalMs: $totalMs)
+}
+"""
+ME = "query Me { me { id name usageGoalMinutes } }"
+WEEKLY_PROGRESS = """
+query WeeklyProgress($weekStart: Date!) {
+  me { weeklyProgress(weekStart: $weekStart) { goalMinutes totalMs percent } }
+}
+"""
+SEARCH_USERS = """
+query SearchUsers($q: String!) {
+  searchUsers(q: $q, limit: 20) { items { id name } nextCursor }
+}
+"""
+SEARCH_TERMS = ["anna", "ben", "schmidt", "ros", "kaya", "lu", "weber 12", "noah"]
+
+SCENARIOS = ["login", "addDailyUsage", "me", "weeklyProgress", "searchUsers"]
+
+
+def build_ops(client, users: int, rng: random.Random) -> Dict[str, Callable[[int], Awaitable[None]]]:
+    tokens = {}
+
+    def token(i: int) -> str:
+        if i not in tokens:
+            tokens[i] = create_access_token(load_user_id(i))
+        return tokens[i]
+
+    this_week = week_start_of(date.today())
+
+    async def login(_: int) -> None:
+        await post_gql(client, LOGIN, {"phone": load_phone(rng.randrange(users)), "password": LOAD_PASSWORD})
+
+    async def add_daily_usage(_: int) -> None:
+        i = rng.randrange(users)
+        day = date.today() - timedelta(days=rng.randrange(7))
+        await post_gql(client, ADD_DAILY_USAGE, {"userId": str(load_user_id(i)), "day": day.isoformat(), "totalMs": rng.randint(30, 600) * 60_000}, token=token(i))
+
+    async def me(_: int) -> None:
+        await post_gql(client, ME, token=token(rng.randrange(users)))
+
+    async def weekly_progress(_: int) -> None:
+        await post_gql(client, WEEKLY_PROGRESS, {"weekStart": this_week.isoformat()}, token=token(rng.randrange(users)))
+
+    async def search_users(_: int) -> None:
+        await post_gql(client, SEARCH_USERS, {"q": rng.choice(SEARCH_TERMS)}, token=token(rng.randrange(users)))
+
+    return {
+        "login": login,
+        "addDailyUsage": add_daily_usage,
+        "me": me,
+        "weeklyProgress": weekly_progress,
+        "searchUsers": search_users,
+    }
+
+
+async def main(args) -> None:
+    rng = random.Random(args.seed)
+    results = []
+    async with asgi_client() as client:
+        ops = build_ops(client, args.users, rng)
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                errors = 0
+
+                async def op(i: int, fn=ops[name]) -> None:
+                    nonlocal errors
+                    try:
+                        await fn(i)
+                    except Exception:
+                        errors += 1
+
+                # warm caches and the pool so the first scenario is not penalised
+                await run_concurrent(op, min(args.warmup, args.requests), concurrency)
+                errors = 0
+                latencies, elapsed = await run_concurrent(op, args.requests, concurrency)
+                results.append(summarize(
+                    f"load.{name}", latencies, elapsed, ops=args.requests,
+                    concurrency=concurrency, errors=errors, dataset_users=args.users,
+                ))
+    emit(results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000, help="must match the bench.seed --users value")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="append JSON lines to this file as well as stdout")
+    asyncio.run(main(parser.parse_args()))
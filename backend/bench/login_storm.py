@@ -0,0 +1,77 @@
+# bench/login_storm.py
+"""
+Latency of unrelated queries while a burst of logins hashes passwords.
+
+    python -m bench.login_storm --logins 200 --login-concurrency 50 --probes 500
+
+Runs the storm once with bcrypt inline on the event loop and once per
+offload mode, probing `me` at the same time. Rejected logins (pool full)
+are counted, not retried.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.auth.auth import create_access_token, hash_password, password_pool
+from app.db.models import User as UserModel
+from app.db.sessions import SessionLocal
+from bench.common import asgi_client, emit, post_gql, run_concurrent, seed_users, summarize
+
+PASSWORD = "bench-password"
+LOGIN = """
+mutation Login($phone: String!, $password: String!) {
+  login(data: { phoneNumber: $phone, password: $password }) { accessToken }
+}
+"""
+ME = "query { me { id } }"
+
+
+async def main(args) -> None:
+    users = await seed_users(args.users, prefix="storm", password_hash=hash_password(PASSWORD))
+    async with SessionLocal() as session:
+        phones = (await session.execute(
+            select(UserModel.phone_number).where(UserModel.id.in_(users))
+        )).scalars().all()
+    token = create_access_token(users[0])
+
+    results = []
+    async with asgi_client() as client:
+        for mode in args.modes:
+            password_pool.shutdown()
+            password_pool.kind = mode
+            password_pool.rejected = 0
+            rejected = 0
+
+            async def login(i: int) -> None:
+                nonlocal rejected
+                try:
+                    await post_gql(client, LOGIN, {"phone": phones[i % len(phones)], "password": PASSWORD})
+                except RuntimeError as e:
+                    if "Server busy" not in str(e):
+                        raise
+                    rejected += 1
+
+            async def probe(i: int) -> None:
+                await post_gql(client, ME, token=token)
+
+            storm = asyncio.create_task(run_concurrent(login, args.logins, args.login_concurrency))
+            probe_lat, probe_elapsed = await run_concurrent(probe, args.probes, args.probe_concurrency)
+            login_lat, login_elapsed = await storm
+            results.append(summarize(f"login_storm.{mode}.login", login_lat, login_elapsed, ops=args.logins, rejected=rejected))
+            results.append(summarize(f"login_storm.{mode}.me_probe", probe_lat, probe_elapsed, ops=args.probes))
+    password_pool.shutdown()
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=500)
+    parser.add_argument("--probe-concurrency", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    asyncio.run(main(parser.parse_args()))
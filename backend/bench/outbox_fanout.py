@@ -0,0 +1,77 @@
+# bench/outbox_fanout.py
+"""
+Outbox drain throughput against a fake push provider.
+
+    python -m bench.outbox_fanout --messages 20000 --recipients 5000 --latency 0.05 --concurrency 1 20 100
+
+Each run enqueues --messages goal_met rows spread over --recipients users
+(so several coalesce into one push), then drains them with OutboxWorker.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.models import OutboxMessage
+from app.db.sessions import SessionLocal
+from app.notifications.outbox import GOAL_MET, OutboxWorker
+from app.notifications.senders import FakePushSender
+from bench.common import emit, seed_users, summarize
+
+
+async def enqueue(recipients, messages: int, run: str) -> None:
+    rng = random.Random(messages)
+    rows = [
+        {
+            "kind": GOAL_MET,
+            "recipient_id": rng.choice(recipients),
+            "dedupe_key": f"bench:{run}:{i}",
+            "payload": {"user_id": "bench", "name": f"friend {i}", "week_start": "2025-01-06", "total_ms": 3_600_000, "goal_minutes": 600},
+        }
+        for i in range(messages)
+    ]
+    async with SessionLocal() as session:
+        for start in range(0, len(rows), 5000):
+            await session.execute(pg_insert(OutboxMessage).values(rows[start:start + 5000]))
+        await session.commit()
+
+
+async def main(args) -> None:
+    recipients = await seed_users(args.recipients, prefix="outbox")
+    results = []
+    for concurrency in args.concurrency:
+        await enqueue(recipients, args.messages, f"c{concurrency}-{time.time_ns()}")
+        sender = FakePushSender(latency=args.latency, failure_rate=args.failure_rate, seed=1)
+        worker = OutboxWorker(sender, batch_size=args.batch_size, concurrency=concurrency, backoff_base=0.01, backoff_max=0.05)
+
+        batch_latencies = []
+        started = time.perf_counter()
+        while worker.sent + worker.failed < args.messages:
+            t0 = time.perf_counter()
+            claimed = await worker.run_once()
+            if claimed:
+                batch_latencies.append(time.perf_counter() - t0)
+            else:
+                await asyncio.sleep(0.01)  # waiting for retries to come due
+        elapsed = time.perf_counter() - started
+        results.append(summarize(
+            "outbox_fanout.drain", batch_latencies, elapsed, ops=worker.sent,
+            concurrency=concurrency, provider_latency_s=args.latency, pushes=len(sender.sent),
+            retried=worker.retried, failed=worker.failed,
+        ))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--recipients", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated provider call time in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 20, 100])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+# bench/seed.py
+"""
+Seed the database with a deterministic load-test dataset.
+
+    python -m bench.seed --users 10000 --connections 20 --days 90
+
+User i gets a fixed id, the phone number +998<i> and the password in
+LOAD_PASSWORD, so bench.load can address any of them without a manifest.
+Re-running is safe: existing rows are left alone and only missing ones are
+added. usage_weekly is rebuilt at the end.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.auth.auth import hash_password
+from app.db.models import Connection as ConnModel, ConnectionStatus, UsageDaily, User as UserModel
+from app.db.rollup import rebuild_weekly_rollup
+from app.db.sessions import SessionLocal
+
+LOAD_NAMESPACE = uuid.UUID("6f1c7a4e-3b0a-4d6e-9a51-5d3c1b7e2f90")
+LOAD_PASSWORD = "load-test-password"
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Elif", "Finn", "Greta", "Hugo", "Ines", "Jonas", "Karla", "Luca", "Mara", "Noah", "Olga", "Paul"]
+LAST_NAMES = ["Schmidt", "Meyer", "Kaya", "Rossi", "Novak", "Berg", "Lange", "Costa", "Weber", "Jansen", "Horvat", "Silva"]
+
+
+def load_user_id(i: int) -> uuid.UUID:
+    return uuid.uuid5(LOAD_NAMESPACE, f"load-{i}")
+
+
+def load_phone(i: int) -> str:
+    return f"+998{i:09d}"
+
+
+def chunked(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def insert_ignoring_existing(model, rows: List[Dict[str, Any]], chunk: int) -> None:
+    async with SessionLocal() as session:
+        for part in chunked(rows, chunk):
+            await session.execute(pg_insert(model).values(part).on_conflict_do_nothing())
+        await session.commit()
+
+
+async def seed(users: int, connections: int, days: int, seed_value: int = 1) -> None:
+    rng = random.Random(seed_value)
+    password_hash = hash_password(LOAD_PASSWORD)
+    started = time.perf_counter()
+
+    await insert_ignoring_existing(UserModel, [
+        {
+            "id": load_user_id(i),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "phone_number": load_phone(i),
+            "password_hash": password_hash,
+            "usage_goal_minutes": rng.choice([300, 600, 900, 1200]),
+            "is_active": True,
+        }
+        for i in range(users)
+    ], chunk=1000)
+    print(f"users: {users}")
+
+    # reciprocal accepted edges to the next `connections // 2` users at a fixed stride
+    edges = set()
+    for i in range(users):
+        for j in range(1, connections // 2 + 1):
+            other = (i + j * 7) % users
+            if other != i:
+                edges.add((i, other))
+                edges.add((other, i))
+    await insert_ignoring_existing(ConnModel, [
+        {"user_id": load_user_id(a), "other_user_id": load_user_id(b), "status": ConnectionStatus.accepted}
+        for a, b in edges
+    ], chunk=5000)
+    print(f"connections: {len(edges)}")
+
+    today = date.today()
+    for start in range(0, users, 500):
+        await insert_ignoring_existing(UsageDaily, [
+            {"id": uuid.uuid4(), "user_id": load_user_id(i), "date": today - timedelta(days=d), "total_ms": rng.randint(30, 600) * 60_000}
+            for i in range(start, min(start + 500, users))
+            for d in range(days)
+        ], chunk=5000)
+    print(f"usage_daily: {users * days}")
+
+    await rebuild_weekly_rollup()
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--connections", type=int, default=20, help="average connections per user")
+    parser.add_argument("--days", type=int, default=90, help="days of usage_daily history per user")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(seed(args.users, args.connections, args.days, args.seed))
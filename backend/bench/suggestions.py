@@ -0,0 +1,108 @@
+# bench/suggestions.py
+"""
+suggestedContacts latency on random graphs of a given average degree.
+
+    python -m bench.suggestions --users 2000 --degrees 50 500
+
+For each degree, seeds --users fresh users and connects each of them to
+degree/2 random others in both directions, then times suggestedContacts
+for --samples viewers twice: once on the live friend-of-friend query, and
+once served from contact_suggestions after precomputing those viewers.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.auth.cache import Principal
+from app.db.models import Connection as ConnModel, ConnectionStatus, ContactSuggestion
+from app.db.sessions import SessionLocal
+from app.db.suggestions import refresh_suggestions
+from bench.common import Timer, emit, gql, seed_users, summarize
+
+SUGGEST = """
+query Suggest($limit: Int!) {
+  suggestedContacts(limit: $limit) { mutualFriends user { id name } }
+}
+"""
+
+
+async def build_graph(user_ids, degree: int, rng: random.Random) -> int:
+    edges = set()
+    n = len(user_ids)
+    for i in range(n):
+        for j in rng.sample(range(n), min(n - 1, degree // 2 + 1)):
+            if j != i:
+                edges.add((i, j))
+                edges.add((j, i))
+    rows = [
+        {"user_id": user_ids[a], "other_user_id": user_ids[b], "status": ConnectionStatus.accepted}
+        for a, b in edges
+    ]
+    async with SessionLocal() as session:
+        for start in range(0, len(rows), 5000):
+            await session.execute(pg_insert(ConnModel).values(rows[start:start + 5000]).on_conflict_do_nothing())
+        await session.commit()
+        await session.execute(text("ANALYZE connections"))
+        await session.commit()
+    return len(rows)
+
+
+async def time_viewers(viewers, limit: int):
+    latencies = []
+    for uid in viewers:
+        me = Principal(id=uid, name="bench", phone_number="", usage_goal_minutes=0, is_active=True)
+        with Timer() as t:
+            await gql(SUGGEST, {"limit": limit}, current_user=me)
+        latencies.append(t.elapsed)
+    return latencies
+
+
+async def main(args) -> None:
+    rng = random.Random(args.seed)
+    results = []
+    for degree in args.degrees:
+        user_ids = await seed_users(args.users, prefix=f"fof{degree}")
+        edges = await build_graph(user_ids, degree, rng)
+        avg_degree = round(edges / len(user_ids), 1)
+        viewers = rng.sample(user_ids, min(args.samples, len(user_ids)))
+
+        latencies = await time_viewers(viewers, args.limit)
+        results.append(summarize(
+            f"suggestions.live.degree{degree}", latencies, sum(latencies), ops=len(latencies),
+            users=args.users, avg_degree=avg_degree,
+        ))
+
+        async with SessionLocal() as session:
+            with Timer() as t:
+                await refresh_suggestions(session, viewers, args.per_user)
+                await session.commit()
+        results.append(summarize(
+            f"suggestions.refresh.degree{degree}", [t.elapsed], t.elapsed, ops=len(viewers),
+            users=args.users, avg_degree=avg_degree,
+        ))
+
+        latencies = await time_viewers(viewers, args.limit)
+        results.append(summarize(
+            f"suggestions.precomputed.degree{degree}", latencies, sum(latencies), ops=len(latencies),
+            users=args.users, avg_degree=avg_degree,
+        ))
+        async with SessionLocal() as session:
+            await session.execute(delete(ContactSuggestion).where(ContactSuggestion.user_id.in_(viewers)))
+            await session.commit()
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--degrees", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--per-user", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=9)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+# bench/usage_ingest.py
+"""
+Per-row addDailyUsage vs. addDailyUsageBatch.
+
+    python -m bench.usage_ingest --requests 50 --sizes 1 10 100
+
+Each "request" uploads a backlog of N days for one user. The per-row path
+needs N mutations to do that, the batch path one.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from app.auth.cache import Principal
+from bench.common import Timer, emit, gql, seed_users, summarize
+
+ADD_ONE = """
+mutation AddDailyUsage($userId: ID!, $day: Date!, $totalMs: Int!) {
+  addDailyUsage(userId: $userId, date_: $day, totalMs: $totalMs)
+}
+"""
+
+ADD_BATCH = """
+mutation AddDailyUsageBatch($entries: [DailyUsageInput!]!) {
+  addDailyUsageBatch(entries: $entries) { userId date totalMs inserted }
+}
+"""
+
+
+def backlog(user_id, size: int, offset: int):
+    start = date(2020, 1, 1) + timedelta(days=offset)
+    return [
+        {"userId": str(user_id), "date": (start + timedelta(days=d)).isoformat(), "totalMs": 1000 * (d + 1)}
+        for d in range(size)
+    ]
+
+
+async def run_per_row(users, size: int, offset: int):
+    latencies = []
+    for user_id in users:
+        me = Principal(id=user_id, name="bench", phone_number="", usage_goal_minutes=0, is_active=True)
+        with Timer() as t:
+            for e in backlog(user_id, size, offset):
+                await gql(ADD_ONE, {"userId": e["userId"], "day": e["date"], "totalMs": e["totalMs"]}, current_user=me)
+        latencies.append(t.elapsed)
+    return latencies
+
+
+async def run_batch(users, size: int, offset: int):
+    latencies = []
+    for user_id in users:
+        me = Principal(id=user_id, name="bench", phone_number="", usage_goal_minutes=0, is_active=True)
+        with Timer() as t:
+            await gql(ADD_BATCH, {"entries": backlog(user_id, size, offset)}, current_user=me)
+        latencies.append(t.elapsed)
+    return latencies
+
+
+async def main(args) -> None:
+    users = await seed_users(args.requests, prefix="ingest")
+    results = []
+    for i, size in enumerate(args.sizes):
+        # disjoint date ranges so every run sees the same insert/update mix
+        for name, runner, offset in (
+            ("per_row", run_per_row, 2000 * i),
+            ("batch", run_batch, 2000 * i + 1000),
+        ):
+            started = time.perf_counter()
+            latencies = await runner(users, size, offset)
+            elapsed = time.perf_counter() - started
+            results.append(summarize(f"usage_ingest.{name}", latencies, elapsed, ops=size * len(users), entries_per_request=size))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="uploads per path and size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+# bench/usage_partitions.py
+"""
+Plain vs. monthly-partitioned usage_daily on a multi-million-row dataset.
+
+    python -m bench.usage_partitions --users 20000 --days 365
+
+Builds two scratch tables shaped like usage_daily (bench_usage_flat and
+bench_usage_part), fills both with --users x --days rows, then compares
+  * weekly range reads (the weeklyProgress / rollover query shape), and
+  * retention: DELETE of everything older than --retain-months vs.
+    dropping the expired partitions.
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.db.partitions import add_months, drop_partitions_before, ensure_partitions
+from app.db.sessions import engine
+from bench.common import Timer, emit, summarize
+
+FLAT = "bench_usage_flat"
+PART = "bench_usage_part"
+COLUMNS = "id uuid NOT NULL, user_id uuid NOT NULL, date date NOT NULL, total_ms integer NOT NULL"
+
+
+async def build(users: int, days: int, today: date) -> None:
+    first = today - timedelta(days=days - 1)
+    async with engine.begin() as conn:
+        for t in (FLAT, PART):
+            await conn.execute(text(f"DROP TABLE IF EXISTS {t} CASCADE"))
+        await conn.execute(text(f"CREATE TABLE {FLAT} ({COLUMNS}, PRIMARY KEY (id), UNIQUE (user_id, date))"))
+        await conn.execute(text(f"CREATE TABLE {PART} ({COLUMNS}, PRIMARY KEY (id, date), UNIQUE (user_id, date)) PARTITION BY RANGE (date)"))
+        await ensure_partitions(conn, first, add_months(today, 1), table=PART)
+
+        await conn.execute(text(f"CREATE TEMP TABLE bench_users AS SELECT gen_random_uuid() AS user_id FROM generate_series(1, {users})"))
+        for t in (FLAT, PART):
+            with Timer() as timer:
+                await conn.execute(text(
+                    f"INSERT INTO {t} (id, user_id, date, total_ms) "
+                    f"SELECT gen_random_uuid(), u.user_id, d::date, (random() * 36000000)::int "
+                    f"FROM bench_users u CROSS JOIN generate_series(:first, :last, interval '1 day') d"
+                ), {"first": first, "last": today})
+            print(f"loaded {t} in {timer.elapsed:.1f}s")
+            await conn.execute(text(f"ANALYZE {t}"))
+
+
+async def weekly_reads(table: str, samples: int, today: date, rng: random.Random):
+    async with engine.connect() as conn:
+        user_ids = (await conn.execute(text(f"SELECT DISTINCT user_id FROM {table} LIMIT 1000"))).scalars().all()
+        latencies = []
+        for _ in range(samples):
+            week = today - timedelta(days=rng.randrange(7, 180))
+            with Timer() as t:
+                await conn.execute(text(
+                    f"SELECT coalesce(sum(total_ms), 0) FROM {table} WHERE user_id = :u AND date >= :s AND date < :e"
+                ), {"u": rng.choice(user_ids), "s": week, "e": week + timedelta(days=7)})
+            latencies.append(t.elapsed)
+    return latencies
+
+
+async def main(args) -> None:
+    today = date.today()
+    rng = random.Random(args.seed)
+    await build(args.users, args.days, today)
+    rows = args.users * args.days
+
+    results = []
+    for table in (FLAT, PART):
+        latencies = await weekly_reads(table, args.samples, today, rng)
+        results.append(summarize(f"usage_partitions.weekly_read.{table}", latencies, sum(latencies), ops=len(latencies), rows=rows))
+
+    cutoff = add_months(today, -args.retain_months).replace(day=1)
+    async with engine.begin() as conn:
+        with Timer() as t:
+            deleted = (await conn.execute(text(f"DELETE FROM {FLAT} WHERE date < :c"), {"c": cutoff})).rowcount
+    results.append(summarize(f"usage_partitions.retention.{FLAT}", [t.elapsed], t.elapsed, ops=deleted, rows=rows))
+    async with engine.begin() as conn:
+        with Timer() as t:
+            dropped = await drop_partitions_before(conn, cutoff, table=PART)
+    results.append(summarize(f"usage_partitions.retention.{PART}", [t.elapsed], t.elapsed, ops=len(dropped), rows=rows))
+
+    if not args.keep:
+        async with engine.begin() as conn:
+            for table in (FLAT, PART):
+                await conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--retain-months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(main(parser.parse_args()))
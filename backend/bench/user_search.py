@@ -0,0 +1,73 @@
+# bench/user_search.py
+"""
+searchUsers latency as the users table grows.
+
+    python -m bench.user_search --sizes 10000 100000 1000000
+
+Tops the table up to each size with pronounceable random names, ANALYZEs,
+then times first pages and a follow-up page for a fixed set of terms.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import func, select, text
+
+from app.auth.cache import Principal
+from app.db.models import User as UserModel
+from app.db.sessions import SessionLocal
+from bench.common import Timer, emit, gql, seed_users, summarize
+
+SEARCH = """
+query Search($q: String!, $after: String) {
+  searchUsers(q: $q, limit: 20, after: $after) { items { id name } nextCursor }
+}
+"""
+TERMS = ["ann", "marco", "li", "sebastian", "kar", "zzq"]
+SYLLABLES = ["an", "na", "ma", "ri", "ko", "li", "sa", "be", "to", "el", "ka", "ro", "mi", "da", "se", "ba", "sti", "ar"]
+
+
+def random_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+    return f"{first.capitalize()} {last.capitalize()}"
+
+
+async def main(args) -> None:
+    rng = random.Random(args.seed)
+    viewer = Principal(id=None, name="bench", phone_number="", usage_goal_minutes=0, is_active=True)
+    results = []
+    for size in args.sizes:
+        async with SessionLocal() as session:
+            have = (await session.execute(select(func.count()).select_from(UserModel))).scalar_one()
+        if have < size:
+            await seed_users(size - have, names=lambda i: random_name(rng))
+            async with SessionLocal() as session:
+                await session.execute(text("ANALYZE users"))
+                await session.commit()
+
+        for term in TERMS:
+            first, second = [], []
+            for _ in range(args.repeat):
+                with Timer() as t:
+                    data = await gql(SEARCH, {"q": term}, current_user=viewer)
+                first.append(t.elapsed)
+                cursor = data["searchUsers"]["nextCursor"]
+                if cursor:
+                    with Timer() as t:
+                        await gql(SEARCH, {"q": term, "after": cursor}, current_user=viewer)
+                    second.append(t.elapsed)
+            results.append(summarize("user_search.first_page", first, sum(first), ops=len(first), users=size, term=term))
+            if second:
+                results.append(summarize("user_search.next_page", second, sum(second), ops=len(second), users=size, term=term))
+    emit(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+# tests/test_app_usage.py
+"""
+An app listed twice for the same day counts twice: the per-app breakdown and
+the day's total_ms must agree. Needs no database.
+"""
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date
+
+from app.auth.cache import Principal
+from app.db.app_usage import app_totals
+from app.graphql import schema as schema_module
+
+ADD_APP_USAGE = """
+mutation AddApps($entries: [DailyAppUsageInput!]!) {
+  addDailyAppUsageBatch(entries: $entries) { userId date totalMs inserted }
+}
+"""
+DAY = date(2026, 10, 14)
+
+
+class NoSession:
+    async def commit(self) -> None:
+        pass
+
+
+def test_app_totals_adds_up_duplicates():
+    assert app_totals([("maps", 1000), ("chat", 500), ("maps", 250)]) == {"maps": 1250, "chat": 500}
+
+
+def test_app_totals_empty_day():
+    assert app_totals([]) == {}
+
+
+def test_batch_passes_summed_apps_to_the_upsert(monkeypatch):
+    user_id = uuid.uuid4()
+    written = []
+
+    async def upsert(session, entries):
+        entries = list(entries)
+        written.extend(entries)
+        return {(u, d): (sum(apps.values()), True) for u, d, apps in entries}, {}
+
+    monkeypatch.setattr(schema_module, "upsert_daily_app_usage", upsert)
+    me = Principal(id=user_id, name="test", phone_number="", usage_goal_minutes=60, is_active=True)
+    result = asyncio.run(schema_module.schema.execute(
+        ADD_APP_USAGE,
+        variable_values={"entries": [{
+            "userId": str(user_id),
+            "date": DAY.isoformat(),
+            "apps": [{"app": "maps", "ms": 1000}, {"app": "chat", "ms": 500}, {"app": "maps", "ms": 250}],
+        }]},
+        context_value={"session": NoSession(), "current_user": me},
+    ))
+
+    assert result.errors is None, result.errors
+    assert written == [(user_id, DAY, {"maps": 1250, "chat": 500})]
+    assert result.data["addDailyAppUsageBatch"][0]["totalMs"] == 1750
@@ -0,0 +1,46 @@
+# tests/test_bulk.py
+"""
+NDJSON values are parsed strictly before they reach COPY. Needs no database.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+
+import pytest
+
+from app.db.bulk import USER_COLUMNS, USER_REQUIRED, _ndjson_records, _strict_bool
+
+USER = {"name": "Anna", "phone_number": "+4915112345678", "password_hash": "!x"}
+
+
+def records(*objs):
+    f = io.BytesIO(b"".join(json.dumps(o).encode() + b"\n" for o in objs))
+
+    async def collect():
+        return [r async for r in _ndjson_records(f, USER_COLUMNS, USER_REQUIRED)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), ("true", True), ("false", False), ("FALSE", False), (" True ", True),
+])
+def test_strict_bool_accepts_booleans_and_their_spelling(value, expected):
+    assert _strict_bool(value) is expected
+
+
+@pytest.mark.parametrize("value", ["no", "0", "", "f", 0, 1, None, []])
+def test_strict_bool_rejects_everything_else(value):
+    with pytest.raises(ValueError):
+        _strict_bool(value)
+
+
+def test_is_active_string_false_stays_false():
+    (row,) = records({**USER, "is_active": "false"})
+    assert row[list(USER_COLUMNS).index("is_active")] is False
+
+
+def test_bad_is_active_names_the_line():
+    with pytest.raises(SystemExit, match="line 2"):
+        records(USER, {**USER, "is_active": "yes"})
@@ -0,0 +1,114 @@
+# tests/test_cost.py
+"""
+Static cost, depth and alias limits, on a small schema of their own. Needs no database.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+import pytest
+import strawberry
+from graphql import parse
+
+from app.graphql import cost
+from app.graphql.cost import Cost, CostLimiter, analyze
+
+resolved = []
+
+
+@strawberry.type
+class Item:
+    id: int
+
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", assumed_size=10, max_size=50)])
+    def children(self, limit: Optional[int] = None) -> List["Item"]:
+        return [Item(id=self.id * 10)]
+
+
+@strawberry.type
+class Query:
+    @strawberry.field(directives=[Cost(weight=2, multiplier="limit", assumed_size=10, max_size=50)])
+    def items(self, limit: Optional[int] = None) -> List[Item]:
+        resolved.append("items")
+        return [Item(id=1)]
+
+    @strawberry.field
+    def ping(self) -> str:
+        return "pong"
+
+
+schema = strawberry.Schema(query=Query, extensions=[CostLimiter])
+
+
+def report(query: str, variables=None, operation_name=None):
+    return analyze(schema._schema, parse(query), operation_name, variables)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("{ ping }", 1),  # undeclared root fields weigh 1
+    ("{ items(limit: 3) { id } }", 6),
+    ("{ items { id } }", 20),  # assumed_size without the argument
+    ("{ items(limit: 3) { children(limit: 2) { id } } }", 3 * (2 + 2 * 2)),
+    ("{ ping items(limit: 1) { id } }", 3),
+    ("{ __typename }", 0),
+])
+def test_cost(query, expected):
+    assert report(query).cost == expected
+
+
+def test_cost_reads_variables_and_their_defaults():
+    query = "query Q($n: Int = 4) { items(limit: $n) { id } }"
+    assert report(query).cost == 8
+    assert report(query, {"n": 5}).cost == 10
+
+
+def test_cost_counts_fragments():
+    query = "{ items(limit: 2) { ...F } } fragment F on Item { children(limit: 3) { id } }"
+    assert report(query).cost == 2 * (2 + 3 * 2)
+
+
+def test_only_the_selected_operation_is_costed():
+    query = "query A { ping } query B { items(limit: 5) { id } }"
+    assert report(query, operation_name="A").cost == 1
+    assert report(query, operation_name="B").cost == 10
+
+
+def test_list_argument_over_max_size_is_an_error():
+    assert report("{ items(limit: 51) { id } }").errors == ["Query.items: limit must be at most 50"]
+    assert report("{ items(limit: 50) { id } }").errors == []
+
+
+def test_depth_and_aliases():
+    r = report("{ a: items { b: children { children { id } } } c: ping }")
+    assert r.depth == 4
+    assert r.aliases == 3
+
+
+def execute(query: str):
+    resolved.clear()
+    return asyncio.run(schema.execute(query))
+
+
+def test_within_budget_runs_and_reports_its_cost():
+    result = execute("{ items(limit: 3) { id } }")
+    assert result.errors is None
+    assert result.extensions["cost"] == {"requested": 6, "maximum": cost.GRAPHQL_MAX_COST}
+
+
+@pytest.mark.parametrize("limit, value, query, message", [
+    ("GRAPHQL_MAX_COST", 10, "{ items { id } }", "Query cost 20 exceeds the maximum of 10"),
+    ("GRAPHQL_MAX_DEPTH", 2, "{ items { children { id } } }", "Query depth 3 exceeds the maximum of 2"),
+    ("GRAPHQL_MAX_ALIASES", 1, "{ a: items { id } b: items { id } }", "Query uses 2 aliases, the maximum is 1"),
+])
+def test_over_a_limit_is_rejected_without_running(monkeypatch, limit, value, query, message):
+    monkeypatch.setattr(cost, limit, value)
+    result = execute(query)
+    assert [e.message for e in result.errors] == [message]
+    assert resolved == []
+
+
+def test_oversized_list_argument_is_rejected_without_running():
+    result = execute("{ items(limit: 500) { id } }")
+    assert [e.message for e in result.errors] == ["Query.items: limit must be at most 50"]
+    assert resolved == []
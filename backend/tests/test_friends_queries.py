@@ -0,0 +1,142 @@
+# tests/test_friends_queries.py
+"""
+friends(weekStart) must resolve with the same number of SQL statements however
+many friends the caller has: one for the friends, one batched weekly total.
+
+Runs against the database at DATABASE_URL (migrated, e.g. by `alembic upgrade head`)
+and is skipped when it cannot be reached. Seeded rows are deleted afterwards.
+"""
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date, timedelta
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import delete, event, exc, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.auth.cache import Principal
+from app.db.models import Connection as ConnModel, ConnectionStatus, UsageDaily, UsageWeekly, User as UserModel
+from app.db.sessions import SessionLocal, engine, read_engine
+from app.db.usage import upsert_daily_usage, week_start_of
+from app.graphql.schema import schema
+
+FRIENDS = """
+query Friends($weekStart: Date!) {
+  friends(weekStart: $weekStart) {
+    user { id name }
+    weeklyProgress { goalMinutes totalMs percent }
+  }
+}
+"""
+SIZES = (1, 5, 25)
+WEEK = week_start_of(date.today())
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            # the pool's connections belong to this event loop
+            await engine.dispose()
+            if read_engine is not None:
+                await read_engine.dispose()
+    return asyncio.run(main())
+
+
+async def seed(friends: int) -> List[uuid.UUID]:
+    """A viewer followed by `friends` accepted connections, each with usage on two days of WEEK."""
+    run_id = uuid.uuid4().hex[:8]
+    ids = [uuid.uuid4() for _ in range(friends + 1)]
+    async with SessionLocal() as session:
+        await session.execute(pg_insert(UserModel).values([
+            {
+                "id": user_id,
+                "name": f"test-{run_id}-{i}",
+                "phone_number": f"+998{run_id}{i:06d}",
+                "password_hash": "!test",
+                "usage_goal_minutes": 60,
+            }
+            for i, user_id in enumerate(ids)
+        ]))
+        await session.execute(pg_insert(ConnModel).values([
+            {"user_id": a, "other_user_id": b, "status": ConnectionStatus.accepted}
+            for other in ids[1:]
+            for a, b in ((ids[0], other), (other, ids[0]))
+        ]))
+        await upsert_daily_usage(session, [
+            (user_id, WEEK + timedelta(days=d), 600_000 * (i + 1))
+            for i, user_id in enumerate(ids[1:])
+            for d in (1, 3)
+        ])
+        await session.commit()
+    return ids
+
+
+async def cleanup(ids: List[uuid.UUID]) -> None:
+    async with SessionLocal() as session:
+        await session.execute(delete(UsageWeekly).where(UsageWeekly.user_id.in_(ids)))
+        await session.execute(delete(UsageDaily).where(UsageDaily.user_id.in_(ids)))
+        await session.execute(delete(ConnModel).where(ConnModel.user_id.in_(ids)))
+        await session.execute(delete(UserModel).where(UserModel.id.in_(ids)))
+        await session.commit()
+
+
+async def friends_with_statement_count(viewer_id: uuid.UUID, week_start: date):
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    viewer = Principal(id=viewer_id, name="test", phone_number="", usage_goal_minutes=60, is_active=True)
+    engines = [e.sync_engine for e in (engine, read_engine) if e is not None]
+    async with SessionLocal() as session:
+        await session.connection()  # check out before counting; pre-ping is not a statement we issue
+        for e in engines:
+            event.listen(e, "before_cursor_execute", count)
+        try:
+            result = await schema.execute(
+                FRIENDS,
+                variable_values={"weekStart": week_start.isoformat()},
+                context_value={"session": session, "current_user": viewer},
+            )
+        finally:
+            for e in engines:
+                event.remove(e, "before_cursor_execute", count)
+    assert result.errors is None, result.errors
+    return result.data["friends"], statements
+
+
+async def statement_counts(week_start: date) -> Dict[int, int]:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except (OSError, exc.DBAPIError) as e:
+        pytest.skip(f"no database at DATABASE_URL: {e}")
+
+    counts = {}
+    for size in SIZES:
+        ids = await seed(size)
+        try:
+            friends, counts[size] = await friends_with_statement_count(ids[0], week_start)
+        finally:
+            await cleanup(ids)
+        assert len(friends) == size
+        assert all(f["weeklyProgress"]["totalMs"] > 0 for f in friends)
+    return counts
+
+
+@pytest.mark.parametrize(
+    "week_start",
+    [WEEK, WEEK + timedelta(days=2)],
+    ids=["iso_week_from_rollup", "other_window_from_daily_sum"],
+)
+def test_friends_statement_count_does_not_grow_with_friends(week_start):
+    counts = run(statement_counts(week_start))
+    assert len(set(counts.values())) == 1, f"statements per friend count: {counts}"
+    # at most: the friends, their weekly totals in one batch, and their goals
+    assert counts[SIZES[0]] <= 3
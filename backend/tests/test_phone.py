@@ -0,0 +1,46 @@
+# tests/test_phone.py
+"""
+Address-book numbers to E.164. Needs no database.
+"""
+from __future__ import annotations
+
+import pytest
+
+from app.phone import normalize_e164
+
+
+@pytest.mark.parametrize("raw, country, expected", [
+    ("+491512345678", None, "+491512345678"),
+    ("+49 151 2345-678", None, "+491512345678"),
+    ("+49 (151) 234.56.78", None, "+491512345678"),
+    ("0049 1512345678", None, "+491512345678"),
+    ("0151 2345678", "49", "+491512345678"),
+    ("0151 2345678", "+49", "+491512345678"),
+    ("151 2345678", "49", "+491512345678"),
+    ("+998 90 123 45 67", "49", "+998901234567"),  # international numbers ignore the default
+    ("+12345678", None, "+12345678"),  # 8 digits, the shortest accepted
+    ("+123456789012345", None, "+123456789012345"),  # 15 digits, the E.164 maximum
+])
+def test_normalizes(raw, country, expected):
+    assert normalize_e164(raw, country) == expected
+
+
+@pytest.mark.parametrize("raw, country", [
+    ("0151 2345678", None),  # national number without a country to put in front
+    ("", "49"),
+    (None, "49"),
+    ("+", None),
+    ("+1234567", None),  # too short
+    ("+1234567890123456", None),  # 16 digits
+    ("+0151234567", None),  # country codes never start with 0
+    ("+49 151 CALL ME", None),
+    ("*31#", "49"),
+    ("+49+1512345678", None),
+])
+def test_rejects(raw, country):
+    assert normalize_e164(raw, country) is None
+
+
+def test_spellings_of_one_number_agree():
+    spellings = ["+49 151 2345678", "0049-151-2345678", "(0151) 2345678", "01512345678"]
+    assert {normalize_e164(s, "49") for s in spellings} == {"+491512345678"}
@@ -0,0 +1,78 @@
+# tests/test_ratelimit.py
+"""
+In-memory token buckets: burst, refill and eviction, on a fake clock. Needs no database.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app import ratelimit
+from app.ratelimit import MemoryBuckets
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(ratelimit, "time", c)
+    return c
+
+
+def take(b: MemoryBuckets, key: str, n: int, rate: float = 1.0, burst: float = 5.0):
+    async def run():
+        return [await b.take(key, rate, burst) for _ in range(n)]
+    return asyncio.run(run())
+
+
+def test_burst_is_admitted_then_refused(clock):
+    b = MemoryBuckets()
+    assert take(b, "u:1", 7) == [True] * 5 + [False] * 2
+
+
+def test_tokens_refill_at_the_rate(clock):
+    b = MemoryBuckets()
+    take(b, "u:1", 5, rate=2.0)
+    clock.now += 1.0
+    assert take(b, "u:1", 3, rate=2.0) == [True, True, False]
+
+
+def test_refill_never_exceeds_burst(clock):
+    b = MemoryBuckets()
+    take(b, "u:1", 5)
+    clock.now += 3600
+    assert take(b, "u:1", 6) == [True] * 5 + [False]
+
+
+def test_buckets_are_per_key(clock):
+    b = MemoryBuckets()
+    take(b, "u:1", 5)
+    assert take(b, "u:2", 1) == [True]
+
+
+def test_full_buckets_are_not_kept(clock):
+    b = MemoryBuckets()
+    take(b, "u:1", 1)
+    assert len(b) == 1
+    clock.now += 10
+    # a refilled bucket is the same as none, so it is dropped instead of stored
+    assert asyncio.run(b.take("u:1", 1.0, 5.0, cost=0))
+    assert len(b) == 0
+
+
+def test_least_recently_used_key_is_evicted(clock):
+    b = MemoryBuckets(max_keys=2)
+    for key in ("u:1", "u:2", "u:3"):
+        take(b, key, 5)
+    assert len(b) == 2
+    # u:1 was evicted, which forgets its empty bucket
+    assert take(b, "u:1", 1) == [True]
+    assert take(b, "u:3", 1) == [False]
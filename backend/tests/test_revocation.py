@@ -0,0 +1,100 @@
+# tests/test_revocation.py
+"""
+The revocation Bloom filter and the lookups it saves. Needs no database: the
+filter is preloaded and the confirming session is a stand-in.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.auth.revocation import BloomFilter, RevocationList
+
+CAPACITY = 10_000
+
+
+@pytest.mark.parametrize("fp_rate", [0.01, 0.001])
+def test_false_positive_rate_stays_near_target_at_capacity(fp_rate):
+    f = BloomFilter(CAPACITY, fp_rate)
+    for i in range(CAPACITY):
+        f.add(f"revoked-{i}")
+    probes = 20 * CAPACITY
+    hits = sum(f"never-{i}" in f for i in range(probes))
+    assert hits / probes <= 1.5 * fp_rate
+
+
+def test_no_false_negatives():
+    f = BloomFilter(CAPACITY, 0.001)
+    keys = [f"revoked-{i}" for i in range(CAPACITY)]
+    for k in keys:
+        f.add(k)
+    assert all(k in f for k in keys)
+    assert f.count == CAPACITY
+
+
+def test_sized_from_capacity_and_rate():
+    # about 14.4 bits and 10 hashes per entry for 0.1%
+    f = BloomFilter(CAPACITY, 0.001)
+    assert 14 * CAPACITY <= f.bits <= 15 * CAPACITY
+    assert f.hashes == 10
+
+
+class Rows:
+    def __init__(self, row) -> None:
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class ConfirmingSession:
+    def __init__(self, revoked) -> None:
+        self.revoked = set(revoked)
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        jti = stmt.compile().params["jti_1"]
+        return Rows((jti,) if jti in self.revoked else None)
+
+
+def loaded(*jtis) -> RevocationList:
+    rl = RevocationList(capacity=CAPACITY, fp_rate=0.001, refresh_every=3600)
+    for jti in jtis:
+        rl._filter.add(jti)
+    # pretend the first build already ran, so no refresh reaches the database
+    rl._watermark = object()
+    rl._refreshed_at = time.monotonic()
+    return rl
+
+
+def test_unrevoked_token_is_answered_by_the_filter_alone():
+    rl = loaded("a", "b")
+    session = ConfirmingSession({"a", "b"})
+    assert not asyncio.run(rl.is_revoked("never-revoked", session))
+    assert session.queries == 0
+    assert rl.stats()["checks"] == 1 and rl.stats()["filter_hits"] == 0
+
+
+def test_filter_hit_is_confirmed_in_the_table():
+    rl = loaded("a")
+    session = ConfirmingSession({"a"})
+    assert asyncio.run(rl.is_revoked("a", session))
+    assert session.queries == 1
+    assert rl.false_positives == 0
+
+
+def test_filter_hit_missing_from_the_table_counts_as_false_positive():
+    rl = loaded("expired-and-purged")
+    session = ConfirmingSession(set())
+    assert not asyncio.run(rl.is_revoked("expired-and-purged", session))
+    assert rl.false_positives == 1
+
+
+def test_tokens_without_jti_are_never_revoked():
+    rl = loaded()
+    assert not asyncio.run(rl.is_revoked(None))
+    assert not asyncio.run(rl.is_revoked(""))
+    assert rl.checks == 0